@@ -0,0 +1,352 @@
+"""
+⏱️ PDF Benchmarks - Merge/split/extract throughput on generated corpora
+
+Usage:
+    python benchmarks/bench_pdf.py run --profile quick --output baseline.json
+    python benchmarks/bench_pdf.py run --profile full --output new.json --only split
+    python benchmarks/bench_pdf.py compare baseline.json new.json --threshold 10
+
+Every case runs in a fresh Python process so its peak RSS is its own. The
+synthetic corpus is generated once into --corpus-dir and reused afterwards.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import PyPDF2  # noqa: E402
+
+import pdf_cache  # noqa: E402
+import pdf_engine  # noqa: E402
+from corpus import CorpusDoc, ensure_corpus_file  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_CORPUS_DIR = os.path.join(BENCH_DIR, '.corpus')
+
+
+@dataclass
+class BenchCase:
+    """One timed operation over a set of corpus documents"""
+    name: str
+    operation: str
+    docs: List[CorpusDoc]
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+def _text(pages: int, name: str = 'doc') -> CorpusDoc:
+    return CorpusDoc(name, pages, 'text')
+
+
+def _image(pages: int, name: str = 'doc') -> CorpusDoc:
+    return CorpusDoc(name, pages, 'image')
+
+
+# Output encodings compared for size against CPU time
+OUTPUT_VARIANTS = {
+    'plain': {},
+    'flate1': {'compress_level': 1},
+    'flate6': {'compress_level': 6},
+    'flate9': {'compress_level': 9},
+    'objstm': {'object_streams': True},
+    'flate6+objstm': {'compress_level': 6, 'object_streams': True},
+    'flate9+objstm': {'compress_level': 9, 'object_streams': True},
+}
+
+
+def build_cases(profile: str) -> List[BenchCase]:
+    """Return the benchmark cases for the 'quick' or 'full' profile"""
+    if profile == 'quick':
+        text_sizes, image_sizes = [1, 100, 1000], [10, 100]
+        many_small, few_large = [_text(2, f'small{i}') for i in range(50)], [_text(500, f'large{i}') for i in range(4)]
+    else:
+        text_sizes, image_sizes = [1, 100, 1000, 10000], [10, 100, 500]
+        many_small, few_large = [_text(2, f'small{i}') for i in range(500)], [_text(2500, f'large{i}') for i in range(4)]
+
+    cases = []
+    for pages in text_sizes:
+        cases.append(BenchCase(f'split/text/{pages}p', 'split', [_text(pages)]))
+        cases.append(BenchCase(f'split_parallel/text/{pages}p', 'split_parallel', [_text(pages)]))
+        cases.append(BenchCase(f'split_chunks/text/{pages}p', 'split_chunks', [_text(pages)],
+                               {'pages_per_file': 100}))
+        cases.append(BenchCase(f'extract/text/{pages}p', 'extract', [_text(pages)]))
+    for pages in image_sizes:
+        cases.append(BenchCase(f'split/image/{pages}p', 'split', [_image(pages)]))
+        cases.append(BenchCase(f'extract/image/{pages}p', 'extract', [_image(pages)]))
+        cases.append(BenchCase(f'merge/image/2x{pages}p', 'merge',
+                               [_image(pages, 'a'), _image(pages, 'b')]))
+
+    for label, docs in ((f'many_small/{len(many_small)}', many_small),
+                        (f'few_large/{len(few_large)}', few_large)):
+        cases.append(BenchCase(f'merge/{label}', 'merge', docs))
+        cases.append(BenchCase(f'merge_streaming/{label}', 'merge_streaming', docs))
+        cases.append(BenchCase(f'merge_dedupe/{label}', 'merge_dedupe', docs))
+
+    # The same template document many times over: every image is a duplicate
+    template = [_image(image_sizes[0], 'template')] * 20
+    for operation in ('merge_streaming', 'merge_dedupe'):
+        cases.append(BenchCase(f'{operation}/template/20x{image_sizes[0]}p', operation, template))
+
+    # What checking every input before a merge costs on large batches
+    for operation in ('merge', 'merge_streaming'):
+        for label, docs in ((f'many_small/{len(many_small)}', many_small),
+                            (f'few_large/{len(few_large)}', few_large)):
+            for setting, enabled in (('on', True), ('off', False)):
+                cases.append(BenchCase(f'preflight/{setting}/{operation}/{label}', operation, docs,
+                                       {'preflight': enabled}))
+
+    # Memory-mapped against plain file-object reads of inputs that are not cached
+    for reader, use_mmap in (('mmap', True), ('file', False)):
+        cases.append(BenchCase(f'input/{reader}/merge_streaming/{len(few_large)}x{few_large[0].pages}p',
+                               'merge_streaming', few_large, {'mmap': use_mmap}))
+        cases.append(BenchCase(f'input/{reader}/probe/{len(many_small)}x{many_small[0].pages}p',
+                               'probe', many_small, {'mmap': use_mmap}))
+
+    # Durability against throughput: one output per page makes fsync costs visible
+    for policy in ('none', 'batch', 'file'):
+        cases.append(BenchCase(f'fsync/{policy}/split/text/{text_sizes[1]}p', 'split',
+                               [_text(text_sizes[1])], {'fsync': policy}))
+
+    for variant, options in OUTPUT_VARIANTS.items():
+        cases.append(BenchCase(f'output/{variant}/merge/2x{text_sizes[-1]}p', 'merge_streaming',
+                               [_text(text_sizes[-1], 'a'), _text(text_sizes[-1], 'b')], options))
+        cases.append(BenchCase(f'output/{variant}/split_chunks/{text_sizes[-1]}p', 'split_chunks',
+                               [_text(text_sizes[-1])], dict(options, pages_per_file=10)))
+    return cases
+
+
+# --- operations (run inside the per-case subprocess) -------------------------
+
+def _run_merge(inputs: List[str], out_dir: str, options: Dict[str, Any]) -> int:
+    return pdf_engine.merge_pdfs(inputs, os.path.join(out_dir, 'merged.pdf'),
+                                 preflight=options.get('preflight', True)).page_count
+
+
+def _output_options(options: Dict[str, Any]) -> Optional[pdf_engine.OutputOptions]:
+    if options.get('compress_level') is None and not options.get('object_streams'):
+        return None
+    return pdf_engine.OutputOptions(compress_level=options.get('compress_level'),
+                                    object_streams=bool(options.get('object_streams')))
+
+
+def _run_merge_streaming(inputs: List[str], out_dir: str, options: Dict[str, Any]) -> int:
+    return pdf_engine.merge_pdfs_streaming(inputs, os.path.join(out_dir, 'merged.pdf'),
+                                           output_options=_output_options(options),
+                                           preflight=options.get('preflight', True)).page_count
+
+
+def _run_merge_dedupe(inputs: List[str], out_dir: str, options: Dict[str, Any]) -> int:
+    return pdf_engine.merge_pdfs_streaming(inputs, os.path.join(out_dir, 'merged.pdf'), dedupe=True).page_count
+
+
+def _run_split(inputs: List[str], out_dir: str, options: Dict[str, Any]) -> int:
+    return pdf_engine.split_pdf(inputs[0], out_dir, fsync=options.get('fsync', 'none')).page_count
+
+
+def _run_split_parallel(inputs: List[str], out_dir: str, options: Dict[str, Any]) -> int:
+    return pdf_engine.split_pdf_parallel(inputs[0], out_dir, workers=options.get('workers')).page_count
+
+
+def _run_split_chunks(inputs: List[str], out_dir: str, options: Dict[str, Any]) -> int:
+    return pdf_engine.split_pdf_every(inputs[0], out_dir, options.get('pages_per_file', 100),
+                                      output_options=_output_options(options)).page_count
+
+
+def _run_probe(inputs: List[str], out_dir: str, options: Dict[str, Any]) -> int:
+    # Trailer-only page counts, as done when a file is selected in the apps
+    return sum(pdf_engine.probe_page_count(path).page_count for path in inputs)
+
+
+def _run_extract(inputs: List[str], out_dir: str, options: Dict[str, Any]) -> int:
+    # Every other page - exercises random access into the page tree
+    page_count = pdf_engine.count_pages(inputs[0])
+    pages = list(range(1, page_count + 1, 2))
+    return pdf_engine.extract_pages(inputs[0], pages, os.path.join(out_dir, 'extract.pdf')).page_count
+
+
+OPERATIONS: Dict[str, Callable[[List[str], str, Dict[str, Any]], int]] = {
+    'merge': _run_merge,
+    'merge_streaming': _run_merge_streaming,
+    'merge_dedupe': _run_merge_dedupe,
+    'split': _run_split,
+    'split_parallel': _run_split_parallel,
+    'split_chunks': _run_split_chunks,
+    'extract': _run_extract,
+    'probe': _run_probe,
+}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    # VmHWM belongs to this process image; ru_maxrss on Linux keeps the
+    # parent's high-water mark across fork/exec
+    try:
+        with open('/proc/self/status', encoding='ascii') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def run_case_in_process(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Time one case in the current process and return its measurements"""
+    runner = OPERATIONS[spec['operation']]
+    pdf_cache.USE_MMAP = spec.get('options', {}).get('mmap', True)
+    out_dir = tempfile.mkdtemp(prefix='pdfbench_')
+    try:
+        start = time.perf_counter()
+        pages = runner(spec['inputs'], out_dir, spec.get('options', {}))
+        wall = time.perf_counter() - start
+        output_bytes = sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir))
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    return {
+        'pages': pages,
+        'wall_seconds': round(wall, 4),
+        'pages_per_second': round(pages / wall, 1) if wall > 0 else None,
+        'peak_rss_mb': _peak_rss_mb(),
+        'output_bytes': output_bytes,
+    }
+
+
+def run_case(case: BenchCase, corpus_dir: str) -> Dict[str, Any]:
+    """Run one case in a fresh interpreter and return its measurements"""
+    inputs = [ensure_corpus_file(corpus_dir, doc) for doc in case.docs]
+    spec = {'operation': case.operation, 'inputs': inputs, 'options': case.options}
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '_case', json.dumps(spec)],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr else 'failed'}
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['input_bytes'] = sum(os.path.getsize(path) for path in inputs)
+    return result
+
+
+def run_benchmarks(args: argparse.Namespace) -> int:
+    cases = [case for case in build_cases(args.profile)
+             if not args.only or any(token in case.name for token in args.only)]
+    results = {}
+
+    for case in cases:
+        best = None
+        for _ in range(args.repeat):
+            result = run_case(case, args.corpus_dir)
+            if 'error' in result or best is None or result['wall_seconds'] < best['wall_seconds']:
+                best = result
+            if 'error' in result:
+                break
+        results[case.name] = best
+        if 'error' in best:
+            print(f"❌ {case.name:40s} {best['error']}")
+        else:
+            print(f"⏱️ {case.name:40s} {best['wall_seconds']:8.3f}s "
+                  f"{best['pages_per_second'] or 0:10.1f} pages/s {best['peak_rss_mb'] or 0:8.1f} MB RSS "
+                  f"{best['output_bytes'] / (1024 * 1024):8.2f} MB out")
+
+    baseline = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'profile': args.profile,
+        'python': platform.python_version(),
+        'pypdf2': PyPDF2.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2)
+        print(f"📁 Results written to {args.output}")
+    return 0 if all('error' not in result for result in results.values()) else 1
+
+
+def compare_baselines(args: argparse.Namespace) -> int:
+    """Print per-case changes; exit 1 if any case regressed beyond the threshold"""
+    with open(args.old, encoding='utf-8') as file:
+        old = json.load(file)['results']
+    with open(args.new, encoding='utf-8') as file:
+        new = json.load(file)['results']
+
+    regressions = 0
+    for name in sorted(set(old) & set(new)):
+        before, after = old[name], new[name]
+        if 'error' in before or 'error' in after:
+            print(f"⚠️ {name:40s} error in one of the runs")
+            continue
+
+        time_change = (after['wall_seconds'] - before['wall_seconds']) / before['wall_seconds'] * 100
+        rss_change = None
+        if before.get('peak_rss_mb') and after.get('peak_rss_mb'):
+            rss_change = (after['peak_rss_mb'] - before['peak_rss_mb']) / before['peak_rss_mb'] * 100
+
+        regressed = time_change > args.threshold or (rss_change is not None and rss_change > args.threshold)
+        regressions += regressed
+        marker = '🔴' if regressed else ('🟢' if time_change < -args.threshold else '⚪')
+        rss_text = f"{rss_change:+6.1f}% RSS" if rss_change is not None else ''
+        print(f"{marker} {name:40s} {time_change:+6.1f}% time {rss_text}")
+
+    for name in sorted(set(old) ^ set(new)):
+        print(f"➖ {name:40s} only in {'old' if name in old else 'new'} baseline")
+
+    print(f"📊 {regressions} regression(s) above {args.threshold:.0f}%")
+    return 1 if regressions else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark PDF merge/split/extract throughput.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help="run the benchmark cases")
+    run.add_argument('--profile', choices=('quick', 'full'), default='quick')
+    run.add_argument('--output', help="write results as a JSON baseline")
+    run.add_argument('--only', nargs='*', help="run only cases whose name contains one of these")
+    run.add_argument('--repeat', type=int, default=1, help="runs per case; the fastest is kept")
+    run.add_argument('--corpus-dir', default=DEFAULT_CORPUS_DIR)
+
+    compare = subparsers.add_parser('compare', help="compare two JSON baselines")
+    compare.add_argument('old')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=10.0,
+                         help="percent slowdown (or RSS growth) counted as a regression")
+
+    case = subparsers.add_parser('_case', help=argparse.SUPPRESS)
+    case.add_argument('spec')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == '_case':
+        print(json.dumps(run_case_in_process(json.loads(args.spec))))
+        return 0
+    if args.command == 'compare':
+        return compare_baselines(args)
+    return run_benchmarks(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
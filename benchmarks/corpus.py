@@ -0,0 +1,108 @@
+"""
+🏭 Benchmark corpus - Synthetic PDFs generated locally
+Documents are deterministic (seeded) so two benchmark runs on the same
+machine always work on identical bytes.
+"""
+
+import os
+import random
+from dataclasses import dataclass
+
+import PyPDF2
+from PyPDF2.generic import (
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+)
+
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+TEXT_LINES_PER_PAGE = 40
+IMAGE_SIDE = 256  # pixels; one RGB image of IMAGE_SIDE² * 3 bytes per page
+
+WORDS = ("invoice statement account balance period total amount due reference "
+         "customer summary payment received opening closing interest charge").split()
+
+
+@dataclass(frozen=True)
+class CorpusDoc:
+    """Description of one synthetic document"""
+    name: str
+    pages: int
+    kind: str = 'text'  # 'text' or 'image'
+
+    @property
+    def file_name(self) -> str:
+        return f"{self.name}_{self.kind}_{self.pages}p.pdf"
+
+
+def _name(value: str) -> NameObject:
+    return NameObject(value)
+
+
+def _text_content(rng: random.Random, doc_name: str, page_num: int) -> bytes:
+    lines = [f"BT /F1 10 Tf 12 TL 50 750 Td ({doc_name} - page {page_num}) Tj"]
+    for _ in range(TEXT_LINES_PER_PAGE):
+        words = ' '.join(rng.choice(WORDS) for _ in range(10))
+        lines.append(f"T* ({words} {rng.randint(0, 999999):06d}) Tj")
+    lines.append("ET")
+    return '\n'.join(lines).encode('latin-1')
+
+
+def _image_stream(rng: random.Random) -> DecodedStreamObject:
+    image = DecodedStreamObject()
+    image.set_data(rng.randbytes(IMAGE_SIDE * IMAGE_SIDE * 3))
+    image.update({
+        _name('/Type'): _name('/XObject'),
+        _name('/Subtype'): _name('/Image'),
+        _name('/Width'): NumberObject(IMAGE_SIDE),
+        _name('/Height'): NumberObject(IMAGE_SIDE),
+        _name('/ColorSpace'): _name('/DeviceRGB'),
+        _name('/BitsPerComponent'): NumberObject(8),
+    })
+    return image
+
+
+def generate_pdf(path: str, doc: CorpusDoc, seed: int = 0) -> None:
+    """Write a synthetic PDF described by doc to path"""
+    rng = random.Random(f"{seed}:{doc.file_name}")
+    pdf_writer = PyPDF2.PdfWriter()
+
+    # Shared resources, as produced by template-based report generators
+    font = pdf_writer._add_object(DictionaryObject({
+        _name('/Type'): _name('/Font'),
+        _name('/Subtype'): _name('/Type1'),
+        _name('/BaseFont'): _name('/Helvetica'),
+    }))
+
+    for page_num in range(1, doc.pages + 1):
+        page = PyPDF2.PageObject.create_blank_page(None, PAGE_WIDTH, PAGE_HEIGHT)
+        resources = DictionaryObject({_name('/Font'): DictionaryObject({_name('/F1'): font})})
+        content = _text_content(rng, doc.name, page_num)
+
+        if doc.kind == 'image':
+            image_ref = pdf_writer._add_object(_image_stream(rng))
+            resources[_name('/XObject')] = DictionaryObject({_name('/Im1'): image_ref})
+            content += b"\nq 512 0 0 512 50 140 cm /Im1 Do Q"
+
+        contents = DecodedStreamObject()
+        contents.set_data(content)
+        page[_name('/Contents')] = pdf_writer._add_object(contents)
+        page[_name('/Resources')] = resources
+        pdf_writer.add_page(page)
+
+    with open(path, 'wb') as output_file:
+        pdf_writer.write(output_file)
+
+
+def ensure_corpus_file(corpus_dir: str, doc: CorpusDoc, seed: int = 0) -> str:
+    """Return the path of doc inside corpus_dir, generating it on first use"""
+    os.makedirs(corpus_dir, exist_ok=True)
+    path = os.path.join(corpus_dir, doc.file_name)
+    if not os.path.exists(path):
+        temp_path = path + '.tmp'
+        generate_pdf(temp_path, doc, seed)
+        os.replace(temp_path, path)
+    return path
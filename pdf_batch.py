@@ -0,0 +1,462 @@
+"""
+📦 PDF Tools - Batch mode
+Runs merge/split/extract jobs from a JSON or CSV manifest without any GUI.
+
+Usage:
+    python pdf_tool_desktop.py merge jobs.json --streaming
+    python pdf_tool_desktop.py merge jobs.json --dedupe
+    python pdf_tool_desktop.py merge jobs.json --incremental
+    python pdf_tool_desktop.py split jobs.json --cache        (reuse identical earlier results)
+    python pdf_tool_desktop.py split jobs.json --compress-level 6 --object-streams
+    python pdf_tool_desktop.py split jobs.json --fsync batch
+    python pdf_tool_desktop.py merge jobs.json --trace merge.json   (stage timings, see pdf_trace.py)
+    python pdf_tool_desktop.py merge jobs.json --profile   (cProfile/tracemalloc reports, see pdf_profile.py)
+    python pdf_tool_desktop.py split jobs.csv --workers 8
+    python pdf_tool_desktop.py split jobs.csv --max-mb 10
+    python pdf_tool_desktop.py extract jobs.json
+    python pdf_tool_desktop.py merge jobs.json --queue night.db   (resumable, see pdf_queue.py)
+    python pdf_tool_desktop.py serve --port 8765   (see pdf_server.py)
+    python pdf_tool_desktop.py watch inbox out --group-by "^(INV-\\d+)"   (see pdf_watch.py)
+
+JSON manifests are a list of job objects (or {"jobs": [...]}):
+    merge:   {"inputs": ["a.pdf", "b.pdf"], "output": "ab.pdf"}
+    split:   {"source": "big.pdf", "output_dir": "pages"}
+             {"source": "big.pdf", "output_dir": "parts", "pages_per_file": 50}
+             (or "max_mb": 10, or "by_outline": true; these override the
+             --pages-per-file/--max-mb/--by-outline defaults)
+    extract: {"source": "big.pdf", "pages": "1-3,7", "output": "part.pdf"}
+             {"source": "big.pdf", "pages": "1-3,7", "output_dir": "parts"}
+             (with output_dir, each range is written to its own file)
+
+CSV manifests use the same keys as column headers; merge inputs are
+separated with ';'. Relative paths are resolved against the manifest folder.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import pdf_engine
+import pdf_trace
+from pdf_output import FSYNC_NONE, FSYNC_POLICIES
+from pdf_output_cache import DEFAULT_MAX_BYTES, OutputCache, merge_settings, output_settings, split_settings
+from pdf_progress import CancelToken, ProgressCallback
+
+
+OPERATIONS = ('merge', 'split', 'extract')
+SPLIT_MODE_KEYS = ('pages_per_file', 'max_mb', 'by_outline')
+
+
+@dataclass
+class JobOutcome:
+    """Result of running a single manifest job"""
+    index: int
+    operation: str
+    target: str
+    ok: bool
+    pages: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+    note: str = ''
+
+
+def load_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """Load the list of jobs from a .json or .csv manifest"""
+    if manifest_path.lower().endswith('.csv'):
+        with open(manifest_path, newline='', encoding='utf-8') as file:
+            jobs = [dict(row) for row in csv.DictReader(file)]
+        for job in jobs:
+            if isinstance(job.get('inputs'), str):
+                job['inputs'] = [p.strip() for p in job['inputs'].split(';') if p.strip()]
+        return jobs
+
+    with open(manifest_path, encoding='utf-8') as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        data = data.get('jobs', [])
+    if not isinstance(data, list):
+        raise pdf_engine.PDFEngineError("Manifest must contain a list of jobs")
+    return data
+
+
+def resolve_path(base_dir: str, path: str) -> str:
+    """Resolve a manifest path relative to the manifest folder"""
+    path = os.path.expanduser(path)
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def _require(job: Dict[str, Any], key: str) -> Any:
+    value = job.get(key)
+    if not value:
+        raise pdf_engine.PDFEngineError(f"Job is missing '{key}'")
+    return value
+
+
+def _output_options(options: argparse.Namespace) -> Optional[pdf_engine.OutputOptions]:
+    if options.compress_level is None and not options.object_streams:
+        return None
+    return pdf_engine.OutputOptions(compress_level=options.compress_level,
+                                    object_streams=options.object_streams)
+
+
+def _cached(options: argparse.Namespace, operation: str, input_paths: List[str], settings: Dict[str, Any],
+            destination: str, produce: Callable[[], Any], folder: bool = False) -> Any:
+    """produce() the job's engine result, or with --cache restore an identical earlier one"""
+    if not options.cache or options.profile:
+        # A profiled job has to do its work rather than restore an earlier result
+        return produce()
+    with OutputCache(options.cache_dir, int(options.cache_max_mb * 1024 * 1024)) as cache:
+        return cache.run(operation, input_paths, settings, destination, produce, folder=folder)
+
+
+def run_merge_job(job: Dict[str, Any], base_dir: str, options: argparse.Namespace,
+                  progress: Optional[ProgressCallback] = None, cancel: Optional[CancelToken] = None) -> JobOutcome:
+    inputs = [resolve_path(base_dir, p) for p in _require(job, 'inputs')]
+    output = resolve_path(base_dir, _require(job, 'output'))
+    output_options = _output_options(options)
+    streaming = bool(options.streaming or options.dedupe or output_options)
+
+    if options.incremental:
+        # Incremental merges already reuse earlier work through their own manifest
+        result = pdf_engine.merge_pdfs_incremental(inputs, output, progress=progress, cancel=cancel,
+                                                   dedupe=options.dedupe, output_options=output_options,
+                                                   fsync=options.fsync, preflight=options.preflight)
+    elif streaming:
+        result = _cached(options, 'merge', inputs, merge_settings(True, options.dedupe, output_options), output,
+                         lambda: pdf_engine.merge_pdfs_streaming(inputs, output, progress=progress, cancel=cancel,
+                                                                 dedupe=options.dedupe, output_options=output_options,
+                                                                 fsync=options.fsync,
+                                                                 preflight=options.preflight))
+    else:
+        result = _cached(options, 'merge', inputs, merge_settings(False), output,
+                         lambda: pdf_engine.merge_pdfs(inputs, output, progress=progress, cancel=cancel,
+                                                       fsync=options.fsync, preflight=options.preflight))
+
+    notes = ['cached'] if result.cached else []
+    if options.incremental:
+        notes.append(f"{result.inputs_reused}/{result.input_count} inputs reused")
+    if options.dedupe and not result.cached:
+        notes.append(f"{result.duplicates_removed} duplicates, "
+                     f"{result.bytes_saved / (1024 * 1024):.1f} MB saved")
+    return JobOutcome(0, 'merge', output, True, pages=result.page_count, note=', '.join(notes))
+
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def run_split_job(job: Dict[str, Any], base_dir: str, options: argparse.Namespace,
+                  progress: Optional[ProgressCallback] = None, cancel: Optional[CancelToken] = None) -> JobOutcome:
+    source = resolve_path(base_dir, _require(job, 'source'))
+    output_dir = resolve_path(base_dir, _require(job, 'output_dir'))
+    os.makedirs(output_dir, exist_ok=True)
+
+    # A job that picks its own split mode ignores the command-line one;
+    # empty CSV cells count as not set
+    if any(job.get(key) not in (None, '') for key in SPLIT_MODE_KEYS):
+        pages_per_file, max_mb, by_outline = (job.get('pages_per_file'), job.get('max_mb'),
+                                              _flag(job.get('by_outline')))
+    else:
+        pages_per_file, max_mb, by_outline = options.pages_per_file, options.max_mb, options.by_outline
+
+    write_options = dict(progress=progress, cancel=cancel, output_options=_output_options(options),
+                         fsync=options.fsync)
+
+    def split():
+        if by_outline:
+            return pdf_engine.split_pdf_by_outline(source, output_dir, **write_options)
+        if max_mb:
+            return pdf_engine.split_pdf_by_size(source, output_dir, float(max_mb), **write_options)
+        if pages_per_file:
+            return pdf_engine.split_pdf_every(source, output_dir, int(pages_per_file), **write_options)
+        # Only this process is profiled, so a profiled split keeps its pages here
+        workers = 1 if options.profile else options.workers
+        return pdf_engine.split_pdf_parallel(source, output_dir, workers=workers, **write_options)
+
+    settings = split_settings(by_outline, max_mb, pages_per_file, _output_options(options))
+    result = _cached(options, 'split', [source], settings, output_dir, split, folder=True)
+    return JobOutcome(0, 'split', output_dir, True, pages=result.page_count, note='cached' if result.cached else '')
+
+
+def run_extract_job(job: Dict[str, Any], base_dir: str, options: argparse.Namespace,
+                    progress: Optional[ProgressCallback] = None, cancel: Optional[CancelToken] = None) -> JobOutcome:
+    source = resolve_path(base_dir, _require(job, 'source'))
+    pages = _require(job, 'pages')
+
+    write_options = dict(progress=progress, cancel=cancel, output_options=_output_options(options),
+                         fsync=options.fsync)
+    settings = dict(pages=pages, per_range=bool(job.get('output_dir')), **output_settings(_output_options(options)))
+
+    if job.get('output_dir'):
+        output_dir = resolve_path(base_dir, job['output_dir'])
+        os.makedirs(output_dir, exist_ok=True)
+        spec = pages if isinstance(pages, str) else ','.join(str(p) for p in pages)
+        split_result = _cached(options, 'extract', [source], settings, output_dir,
+                               lambda: pdf_engine.split_page_ranges(source, spec, output_dir, **write_options),
+                               folder=True)
+        return JobOutcome(0, 'extract', output_dir, True, pages=split_result.page_count,
+                          note='cached' if split_result.cached else '')
+
+    output = resolve_path(base_dir, _require(job, 'output'))
+    def extract():
+        if isinstance(pages, str):
+            return pdf_engine.extract_page_ranges(source, pages, output, **write_options)
+        return pdf_engine.extract_pages(source, [int(p) for p in pages], output, **write_options)
+
+    result = _cached(options, 'extract', [source], settings, output, extract)
+    return JobOutcome(0, 'extract', output, True, pages=result.page_count, note='cached' if result.cached else '')
+
+
+JOB_RUNNERS: Dict[str, Callable[..., JobOutcome]] = {
+    'merge': run_merge_job,
+    'split': run_split_job,
+    'extract': run_extract_job,
+}
+
+
+def run_jobs(operation: str, jobs: List[Dict[str, Any]], base_dir: str,
+             options: argparse.Namespace) -> List[JobOutcome]:
+    """Run every job in order, never letting one failure stop the batch"""
+    return [run_job(operation, job, base_dir, options, index) for index, job in enumerate(jobs, 1)]
+
+
+def run_job(operation: str, job: Dict[str, Any], base_dir: str, options: argparse.Namespace,
+            index: int = 0) -> JobOutcome:
+    """Run a single job, turning any error into a failed JobOutcome"""
+    start = time.perf_counter()
+    try:
+        if options.profile:
+            import pdf_profile
+            with pdf_profile.profiled(resolve_path(base_dir, job_target(job)), f"{operation} job {index}") as report:
+                outcome = JOB_RUNNERS[operation](job, base_dir, options)
+            outcome.note = ', '.join(filter(None, [outcome.note, f"profile: {report.report_path}"]))
+        else:
+            outcome = JOB_RUNNERS[operation](job, base_dir, options)
+    except Exception as e:
+        outcome = JobOutcome(index, operation, job_target(job), False, error=str(e))
+    outcome.index = index
+    outcome.seconds = time.perf_counter() - start
+    return outcome
+
+
+def job_target(job: Dict[str, Any]) -> str:
+    """The output file or folder named by a job, as written in the manifest"""
+    return str(job.get('output') or job.get('output_dir') or '')
+
+
+def describe_outcome(outcome: JobOutcome) -> str:
+    """One summary line for a finished job"""
+    if outcome.ok:
+        note = f", {outcome.note}" if outcome.note else ''
+        return (f"✅ [{outcome.index}] {outcome.operation} -> {outcome.target} "
+                f"({outcome.pages} pages, {outcome.seconds:.2f}s{note})")
+    return f"❌ [{outcome.index}] {outcome.operation} -> {outcome.target or '?'}: {outcome.error}"
+
+
+def print_summary(outcomes: List[JobOutcome], stream=None) -> None:
+    """Print one line per job followed by a totals line"""
+    stream = stream or sys.stdout
+    for outcome in outcomes:
+        print(describe_outcome(outcome), file=stream)
+
+    failed = sum(1 for outcome in outcomes if not outcome.ok)
+    print(f"📊 {len(outcomes) - failed}/{len(outcomes)} jobs succeeded, {failed} failed", file=stream)
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser, flag: bool = True) -> None:
+    if flag:
+        parser.add_argument('--cache', action='store_true',
+                            help="reuse the outputs of identical earlier jobs (same inputs, operation and options)")
+    parser.add_argument('--cache-dir', metavar='DIR', help="output cache folder (default: the user cache folder)")
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024), metavar='MB',
+                        help="evict least recently used results beyond this size")
+
+
+def add_trace_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--trace', metavar='PATH',
+                        help=f"record stage timings to PATH: .json for a Chrome trace, else JSON lines "
+                             f"(same as setting {pdf_trace.ENV_VAR})")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='pdf_tool_desktop.py',
+        description="Run PDF merge/split/extract jobs from a manifest file.")
+    subparsers = parser.add_subparsers(dest='operation', required=True)
+
+    for operation in OPERATIONS:
+        sub = subparsers.add_parser(operation, help=f"run {operation} jobs from a manifest")
+        sub.add_argument('manifest', help="path to a .json or .csv job manifest")
+        sub.add_argument('--compress-level', type=int, choices=range(1, 10), metavar='1-9',
+                         help="Flate-compress uncompressed streams at this zlib level")
+        sub.add_argument('--object-streams', action='store_true',
+                         help="pack objects into compressed object streams with an xref stream")
+        sub.add_argument('--fsync', choices=FSYNC_POLICIES, default=FSYNC_NONE,
+                         help="when outputs are synced to disk: never, per file, or once per job")
+        add_cache_arguments(sub)
+        add_trace_argument(sub)
+        sub.add_argument('--profile', action='store_true',
+                         help="run each job under cProfile and tracemalloc; reports are written next to its output")
+        sub.add_argument('--queue', metavar='DB',
+                         help="record the jobs in this queue file first; rerun to resume after a crash")
+        if operation == 'merge':
+            sub.add_argument('--streaming', action='store_true',
+                             help="write output incrementally, holding one input in memory at a time")
+            sub.add_argument('--dedupe', action='store_true',
+                             help="write identical fonts/images once (implies --streaming)")
+            sub.add_argument('--incremental', action='store_true',
+                             help="reuse the pages of inputs unchanged since the last run of the job "
+                                  "(implies --streaming)")
+            sub.add_argument('--no-preflight', dest='preflight', action='store_false',
+                             help="skip checking every input before writing (bad inputs then fail mid-merge)")
+            # --compress-level/--object-streams also imply --streaming for merges
+        if operation == 'split':
+            sub.add_argument('--workers', type=int, default=pdf_engine.default_workers(),
+                             help="processes used per split job (default: CPU count)")
+            mode = sub.add_mutually_exclusive_group()
+            mode.add_argument('--pages-per-file', type=int, metavar='N',
+                              help="write N pages per output file instead of one")
+            mode.add_argument('--max-mb', type=float, metavar='MB',
+                              help="write consecutive files of at most about MB megabytes")
+            mode.add_argument('--by-outline', action='store_true',
+                              help="write one file per top-level bookmark")
+
+    cache = subparsers.add_parser('cache', help="show statistics for, or clear, the output cache")
+    add_cache_arguments(cache, flag=False)
+    cache.add_argument('--clear', action='store_true', help="remove every cached result")
+
+    queue = subparsers.add_parser('queue', help="resume or inspect the jobs recorded in a queue file")
+    queue.add_argument('db', help="queue file created with --queue")
+    queue_action = queue.add_mutually_exclusive_group()
+    queue_action.add_argument('--status', action='store_true', help="show job counts and failures, run nothing")
+    queue_action.add_argument('--retry-failed', action='store_true', help="run failed jobs again")
+    add_trace_argument(queue)
+
+    serve = subparsers.add_parser('serve', help="run a job server on localhost HTTP or a Unix socket")
+    serve.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    serve.add_argument('--port', type=int, default=8765, help="TCP port to listen on (default: 8765)")
+    serve.add_argument('--unix-socket', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    serve.add_argument('--workers', type=int, default=pdf_engine.default_workers(),
+                       help="jobs run at the same time, one process each (default: CPU count)")
+    serve.add_argument('--max-pending', type=int, metavar='N',
+                       help="queued plus running jobs accepted before clients get 503 (default: 4 per worker)")
+    serve.add_argument('--root', default='.', help="folder relative job paths are resolved against")
+    add_trace_argument(serve)
+
+    watch = subparsers.add_parser('watch', help="turn PDFs dropped into a folder into merge or split jobs")
+    watch.add_argument('inbox', help="folder to watch")
+    watch.add_argument('output_dir', help="folder outputs are written to")
+    # 'operation' already names the subcommand
+    watch.add_argument('--operation', dest='watch_operation', choices=('merge', 'split'), default='merge')
+    watch.add_argument('--pattern', default='*.pdf', help="file names to pick up (default: *.pdf)")
+    watch.add_argument('--group-by', metavar='REGEX',
+                       help="merge files whose names give the same match (or first group) into one output")
+    watch.add_argument('--window', type=float, default=10.0, metavar='SECONDS',
+                       help="close a merge group once no file has joined it for this long (default: 10)")
+    watch.add_argument('--settle', type=float, default=2.0, metavar='SECONDS',
+                       help="take a file once it has not changed for this long (default: 2)")
+    watch.add_argument('--poll', type=float, default=1.0, metavar='SECONDS', help="scan interval (default: 1)")
+    watch.add_argument('--workers', type=int, default=pdf_engine.default_workers(),
+                       help="jobs run at the same time, one process each (default: CPU count)")
+    watch.add_argument('--options', type=json.loads, default={}, metavar='JSON',
+                       help='job options by name, e.g. \'{"dedupe": true}\' (as for the job server)')
+    watch.add_argument('--report', type=float, default=60.0, metavar='SECONDS',
+                       help="print throughput metrics this often (default: 60)")
+    watch.add_argument('--once', action='store_true', help="exit once the folder has nothing left to process")
+    add_trace_argument(watch)
+
+    return parser
+
+
+def default_options(operation: str, **overrides: Any) -> argparse.Namespace:
+    """Command-line defaults for operation with overrides applied, for callers without a command line"""
+    options = build_parser().parse_args([operation, '-'])
+    for key, value in overrides.items():
+        if key == 'manifest' or not hasattr(options, key):
+            raise pdf_engine.PDFEngineError(f"Unknown {operation} option '{key}'")
+        setattr(options, key, value)
+    return options
+
+
+def run_queue_command(args: argparse.Namespace) -> int:
+    """Handle 'queue DB': resume pending jobs, retry failed ones, or show status"""
+    import pdf_queue
+    with pdf_queue.JobQueue(args.db) as queue:
+        queue.recover()
+        if args.retry_failed:
+            queue.retry_failed()
+        if not args.status:
+            pdf_queue.run_queue(queue)
+        pdf_queue.print_status(queue)
+        counts = queue.counts()
+    # Jobs still running under another worker leave the run unfinished, too
+    return 0 if counts['done'] == sum(counts.values()) else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """🚀 Batch entry point - returns the process exit code"""
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'trace', None):
+        pdf_trace.enable(args.trace)
+
+    if args.operation == 'serve':
+        import pdf_server
+        return pdf_server.serve(host=args.host, port=args.port, unix_socket=args.unix_socket,
+                                workers=args.workers, max_pending=args.max_pending, root=args.root)
+
+    if args.operation == 'watch':
+        import pdf_watch
+        config = pdf_watch.WatchConfig(inbox=args.inbox, output_dir=args.output_dir, operation=args.watch_operation,
+                                       pattern=args.pattern, group_by=args.group_by, window=args.window,
+                                       settle=args.settle, poll=args.poll, workers=args.workers,
+                                       options=args.options)
+        return pdf_watch.watch(config, once=args.once, report_interval=args.report)
+
+    if args.operation == 'queue':
+        return run_queue_command(args)
+    if args.operation == 'cache':
+        with OutputCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024)) as cache:
+            if args.clear:
+                cache.clear()
+            cache.evict()
+            print(f"🗄️ {cache.directory}: {cache.stats().describe()}")
+        return 0
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError, pdf_engine.PDFEngineError) as e:
+        print(f"❌ Could not read manifest: {e}", file=sys.stderr)
+        return 2
+
+    base_dir = os.path.dirname(os.path.abspath(args.manifest))
+    if args.queue:
+        import pdf_queue
+        with pdf_queue.JobQueue(args.queue) as queue:
+            try:
+                run = queue.enqueue_manifest(args.manifest, args.operation, jobs, base_dir,
+                                             pdf_queue.job_options(args))
+            except pdf_engine.PDFEngineError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return 2
+            pdf_queue.run_queue(queue, run)
+            counts = queue.counts(run)
+        # Totals of the run that was recorded (and possibly resumed), not of the manifest as read now
+        total = sum(counts.values())
+        print(f"📊 {counts['done']}/{total} jobs succeeded, {counts['failed']} failed")
+        return 0 if counts['done'] == total else 1
+
+    outcomes = run_jobs(args.operation, jobs, base_dir, args)
+    print_summary(outcomes)
+
+    return 0 if all(outcome.ok for outcome in outcomes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
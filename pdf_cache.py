@@ -0,0 +1,213 @@
+"""
+🗂️ PDF Cache - Parsed document handles shared between steps
+Parsing a PDF once is enough; the split/merge that follows reuses the same
+reader instead of parsing the file again. Page counts found by the cheap
+probe at selection time are kept as well, so a split can size its work
+without parsing the file in the parent process. Inputs that are not cached are read
+through a memory map, so PdfReader's many small seeks and reads are served
+from the OS page cache instead of one system call each.
+"""
+
+import io
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import PyPDF2
+
+import pdf_trace
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 16
+# Probed page counts are tiny, so many more of them are kept than readers
+MAX_PAGE_COUNTS = 4096
+
+# Set to False to read inputs through plain file objects (e.g. to compare)
+USE_MMAP = True
+
+CacheKey = Tuple[str, int, int]
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a DocumentCache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes_cached: int = 0
+
+
+def map_file(file: BinaryIO) -> Optional[mmap.mmap]:
+    """Read-only memory map of an open file, or None if it cannot be mapped
+
+    Empty files, pipes and some network filesystems cannot be mapped.
+    """
+    if not USE_MMAP:
+        return None
+    try:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def open_input(path: str) -> Iterator[BinaryIO]:
+    """Open path for a PdfReader: memory-mapped when possible, else the file itself
+
+    The mapping is closed on exit, so readers built inside the block must not
+    be used after it.
+    """
+    with pdf_trace.span('open', file=os.path.basename(path)):
+        file = open(path, 'rb')
+        mapped = map_file(file)
+    with file:
+        if mapped is None:
+            yield file
+            return
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def document_key(path: str) -> CacheKey:
+    """Return the (path, mtime, size) key identifying one version of a file"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+class DocumentCache:
+    """LRU cache of parsed PdfReader objects keyed by path, mtime and size
+
+    Each reader holds the whole file in memory, so the cache is bounded by the
+    total size of the cached files (max_bytes) as well as by entry count.
+    Files larger than max_bytes are parsed from a memory map and never
+    cached; the map lives as long as the returned reader. Readers are not
+    thread-safe; callers should not use the same reader from two threads at once.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[CacheKey, PyPDF2.PdfReader]]" = OrderedDict()
+        self._bytes = 0
+        self._page_counts: "OrderedDict[CacheKey, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get_reader(self, path: str) -> PyPDF2.PdfReader:
+        """Return a parsed reader for path, parsing it only if not cached"""
+        key = document_key(path)
+
+        with self._lock:
+            entry = self._entries.get(key[0])
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(key[0])
+                self.stats.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key[0])
+            self.stats.misses += 1
+
+        with pdf_trace.span('open', file=os.path.basename(key[0])), open(key[0], 'rb') as file:
+            mapped = map_file(file) if key[2] > self.max_bytes else None
+            data = mapped if mapped is not None else io.BytesIO(file.read())
+        with pdf_trace.span('parse', file=os.path.basename(key[0])):
+            reader = PyPDF2.PdfReader(data)
+        # Every caller needs the pages; walk the page tree once, up front
+        with pdf_trace.span('page_tree'):
+            len(reader.pages)
+
+        with self._lock:
+            self._store(key, reader)
+        return reader
+
+    def peek(self, path: str) -> Optional[PyPDF2.PdfReader]:
+        """Return the cached reader for path if it is still current, without parsing"""
+        try:
+            key = document_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key[0])
+            return entry[1] if entry is not None and entry[0] == key else None
+
+    def page_count(self, path: str) -> Optional[int]:
+        """Page count of path from a cached reader or an earlier probe, without reading the file"""
+        reader = self.peek(path)
+        if reader is not None:
+            return len(reader.pages)
+        try:
+            key = document_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            page_count = self._page_counts.get(key)
+            if page_count is not None:
+                self._page_counts.move_to_end(key)
+            return page_count
+
+    def remember_page_count(self, path: str, page_count: int) -> None:
+        """Keep a page count found without a full parse (see pdf_engine.probe_page_count)"""
+        try:
+            key = document_key(path)
+        except OSError:
+            return
+        with self._lock:
+            self._page_counts[key] = page_count
+            self._page_counts.move_to_end(key)
+            while len(self._page_counts) > MAX_PAGE_COUNTS:
+                self._page_counts.popitem(last=False)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget one file, or everything when path is None"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._page_counts.clear()
+                self._bytes = 0
+            else:
+                path = os.path.abspath(path)
+                self._remove(path)
+                for key in [key for key in self._page_counts if key[0] == path]:
+                    del self._page_counts[key]
+            self._update_stats()
+
+    def _store(self, key: CacheKey, reader: PyPDF2.PdfReader) -> None:
+        size = key[2]
+        if size > self.max_bytes:
+            return
+        self._remove(key[0])
+        self._entries[key[0]] = (key, reader)
+        self._bytes += size
+
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+        self._update_stats()
+
+    def _remove(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry[0][2]
+
+    def _update_stats(self) -> None:
+        self.stats.entries = len(self._entries)
+        self.stats.bytes_cached = self._bytes
+
+
+# Shared cache used by pdf_engine and the desktop apps
+document_cache = DocumentCache()
+
+
+def get_reader(path: str) -> PyPDF2.PdfReader:
+    """Return a parsed reader for path from the shared document cache"""
+    return document_cache.get_reader(path)
@@ -0,0 +1,889 @@
+"""
+⚙️ PDF Engine - Headless merge/split core
+All PDF processing used by the desktop apps lives here, free of any Tk code,
+so it can be scripted, benchmarked and run in batch jobs.
+"""
+
+import multiprocessing
+import os
+import queue
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import PyPDF2
+
+import pdf_incremental
+import pdf_preflight
+import pdf_trace
+from pdf_cache import document_cache, get_reader, open_input
+from pdf_output import DEFAULT_BUFFER_SIZE, FSYNC_NONE, OutputBatch
+from pdf_progress import CancelToken, JobCancelled, ProgressCallback, ProgressReporter
+from pdf_stream_writer import DEFAULT_COMPRESS_LEVEL, OutputOptions, StreamingPdfWriter
+
+
+class PDFEngineError(Exception):
+    """Raised when a PDF operation cannot be completed"""
+
+
+class PreflightError(PDFEngineError):
+    """Raised before a merge writes anything when some of its inputs cannot be merged"""
+
+    def __init__(self, report: 'pdf_preflight.PreflightReport'):
+        super().__init__(report.describe_failures())
+        self.report = report
+
+
+@dataclass
+class MergeResult:
+    """Outcome of a merge operation"""
+    output_path: str
+    input_count: int
+    page_count: int
+    duplicates_removed: int = 0
+    bytes_saved: int = 0
+    inputs_reused: int = 0
+    cached: bool = False  # restored from the output cache
+
+
+@dataclass
+class SplitResult:
+    """Outcome of a split operation"""
+    source_path: str
+    output_dir: str
+    page_count: int
+    output_paths: List[str] = field(default_factory=list)
+    cached: bool = False
+
+
+@dataclass
+class ExtractResult:
+    """Outcome of a page-range extraction"""
+    source_path: str
+    output_path: str
+    page_count: int
+    cached: bool = False
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of a page-count probe"""
+    source_path: str
+    page_count: int
+    seconds: float
+    method: str  # 'cache', 'probe' or 'full'
+
+
+def page_output_name(base_name: str, page_num: int) -> str:
+    """Return the file name used for a single split page (1-based)"""
+    return f"{base_name}_page_{page_num}.pdf"
+
+
+def source_base_name(source_path: str) -> str:
+    """Return the source file name without directory or extension"""
+    return os.path.splitext(os.path.basename(source_path))[0]
+
+
+def range_output_name(base_name: str, first_page: int, last_page: int) -> str:
+    """Return the file name used for one page range of a per-range extraction"""
+    if first_page == last_page:
+        return page_output_name(base_name, first_page)
+    return f"{base_name}_pages_{first_page}-{last_page}.pdf"
+
+
+def parse_page_spec(spec: str, page_count: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Parse a page spec such as '1-3,7,10-12' into (first, last) ranges
+
+    Ranges keep the order they were written in. When page_count is given,
+    every page must fall inside 1..page_count.
+    """
+    ranges = []
+    for part in spec.replace(' ', '').split(','):
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise PDFEngineError(f"Invalid page range '{part}'") from None
+
+        if start < 1 or start > end:
+            raise PDFEngineError(f"Invalid page range '{part}'")
+        if page_count is not None and end > page_count:
+            raise PDFEngineError(f"Page range '{part}' is out of range (1-{page_count})")
+        ranges.append((start, end))
+
+    if not ranges:
+        raise PDFEngineError("No pages specified")
+    return ranges
+
+
+def parse_page_ranges(spec: str, page_count: Optional[int] = None) -> List[int]:
+    """Parse a page spec such as '1-3,7,10-12' into 1-based page numbers"""
+    pages = []
+    for start, end in parse_page_spec(spec, page_count):
+        pages.extend(range(start, end + 1))
+    return pages
+
+
+def count_pages(source_path: str) -> int:
+    """Return the number of pages in a PDF (the parsed reader stays cached)"""
+    return len(get_reader(source_path).pages)
+
+
+def _read_page_count(source_path: str) -> int:
+    """Read /Root /Pages /Count using only the xref and trailer
+
+    PdfReader parses just the cross-reference data and trailer when it is
+    constructed from a file object; the page tree is only walked once
+    .pages is used, so this never touches the individual pages.
+    """
+    with open_input(source_path) as file:
+        with pdf_trace.span('parse', file=os.path.basename(source_path)):
+            pdf_reader = PyPDF2.PdfReader(file)
+        pages_root = pdf_reader.trailer['/Root'].get_object()['/Pages'].get_object()
+        page_count = pages_root['/Count']
+
+    if not isinstance(page_count, int) or page_count < 0:
+        raise PDFEngineError(f"Invalid /Count in page tree: {page_count!r}")
+    return int(page_count)
+
+
+@pdf_trace.traced('probe')
+def probe_page_count(source_path: str) -> ProbeResult:
+    """Return the page count quickly, falling back to a full parse for malformed files
+
+    The count is remembered in the document cache for later probes (such as
+    split_pdf_parallel sizing its chunks). A probe does not leave a parsed
+    reader behind, so a split that needs one in-process parses the file then.
+    """
+    start = time.perf_counter()
+
+    page_count = document_cache.page_count(source_path)
+    if page_count is not None:
+        method = 'cache'
+    else:
+        try:
+            page_count, method = _read_page_count(source_path), 'probe'
+            document_cache.remember_page_count(source_path, page_count)
+        except Exception:
+            page_count, method = count_pages(source_path), 'full'
+
+    return ProbeResult(source_path=source_path,
+                       page_count=page_count,
+                       seconds=time.perf_counter() - start,
+                       method=method)
+
+
+def _parse(file, source_path: str) -> PyPDF2.PdfReader:
+    with pdf_trace.span('parse', file=os.path.basename(source_path)):
+        return PyPDF2.PdfReader(file)
+
+
+def _check_cancel(cancel: Optional[CancelToken]) -> None:
+    if cancel is not None:
+        cancel.check()
+
+
+class _CancellablePdfWriter(PyPDF2.PdfWriter):
+    """PdfWriter that checks a cancel token before each page it adds"""
+
+    def __init__(self, cancel: Optional[CancelToken]):
+        super().__init__()
+        self._cancel = cancel
+
+    def add_page(self, page, excluded_keys=()):
+        # append() copies inputs through add_page, one page at a time
+        _check_cancel(self._cancel)
+        return super().add_page(page, excluded_keys)
+
+
+class _CancellableStream:
+    """Output stream that checks a cancel token on every write, so PdfWriter.write can be stopped"""
+
+    def __init__(self, stream, cancel: CancelToken):
+        self._stream = stream
+        self._cancel = cancel
+
+    def write(self, data: bytes) -> int:
+        self._cancel.check()
+        return self._stream.write(data)
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+
+# File system timestamps come from a coarse clock and can trail time.time()
+# (FAT and some SMB shares store them in 2-second steps)
+MTIME_SLACK_SECONDS = 2.0
+
+
+def _remove_partial_outputs(paths: Sequence[str], since: float) -> None:
+    """Delete outputs written by a job that did not finish (files modified since `since`)"""
+    for path in paths:
+        try:
+            if os.path.getmtime(path) >= since - MTIME_SLACK_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _total_pages(input_paths: Sequence[str], progress: Optional[ProgressCallback]) -> int:
+    """Total page count for progress reporting (skipped when nobody is listening)"""
+    if progress is None:
+        return 0
+    return sum(probe_page_count(file_path).page_count for file_path in input_paths)
+
+
+def _preflight_inputs(input_paths: Sequence[str], cancel: Optional[CancelToken],
+                      keep_readers: bool = False) -> pdf_preflight.PreflightReport:
+    """Check every input before any output is written, failing with a report of all bad ones"""
+    report = pdf_preflight.preflight(input_paths, cancel=cancel, keep_readers=keep_readers)
+    if report.failures:
+        raise PreflightError(report)
+    return report
+
+
+@pdf_trace.traced('merge')
+def merge_pdfs(input_paths: Sequence[str], output_path: str,
+               progress: Optional[ProgressCallback] = None,
+               cancel: Optional[CancelToken] = None,
+               fsync: str = FSYNC_NONE,
+               preflight: bool = True) -> MergeResult:
+    """Merge the given PDFs, in order, into output_path
+
+    Cancellation is checked before every page is appended and while the
+    output is written; nothing is written until every input has been
+    appended. Like every engine output, the file is written under a
+    temporary name and renamed into place when complete; fsync is the
+    pdf_output policy ('none', 'file' or 'batch'). With preflight, all
+    inputs are checked up front (see pdf_preflight).
+    """
+    if len(input_paths) < 2:
+        raise PDFEngineError("Please select at least 2 PDF files to merge.")
+
+    # Every input ends up in memory here anyway, so preflight leaves its readers in the document cache
+    pages_total = (_preflight_inputs(input_paths, cancel, keep_readers=True).page_count if preflight
+                   else _total_pages(input_paths, progress))
+    reporter = ProgressReporter('merge', pages_total, progress)
+    pdf_writer = _CancellablePdfWriter(cancel)
+    for file_path in input_paths:
+        _check_cancel(cancel)
+        pdf_reader = get_reader(file_path)
+        with pdf_trace.span('append', file=os.path.basename(file_path)):
+            pdf_writer.append(pdf_reader)
+        pdf_trace.count('pages', len(pdf_reader.pages))
+        reporter.advance(len(pdf_reader.pages))
+
+    page_count = len(pdf_writer.pages)
+    _check_cancel(cancel)
+
+    with OutputBatch(fsync) as outputs, outputs.open(output_path) as output_file:
+        with pdf_trace.span('write'):
+            pdf_writer.write(output_file if cancel is None else _CancellableStream(output_file, cancel))
+        reporter.advance(0, output_file.tell())
+
+    return MergeResult(output_path=output_path,
+                       input_count=len(input_paths),
+                       page_count=page_count)
+
+
+@pdf_trace.traced('merge')
+def merge_pdfs_streaming(input_paths: Sequence[str], output_path: str,
+                         progress: Optional[ProgressCallback] = None,
+                         cancel: Optional[CancelToken] = None,
+                         dedupe: bool = False,
+                         output_options: Optional[OutputOptions] = None,
+                         fsync: str = FSYNC_NONE,
+                         preflight: bool = True) -> MergeResult:
+    """Merge the given PDFs with bounded memory
+
+    Each input is opened, copied page by page straight into output_path and
+    closed before the next one is read, so peak memory follows the largest
+    single input rather than the sum of all inputs. Outlines and form fields
+    of the inputs are not carried over. Cancellation is checked after every
+    page; a cancelled or failed merge leaves no output behind.
+
+    With dedupe=True, fonts, images and other resources that are identical
+    across (or within) the inputs are written once; the result reports how
+    many copies were dropped and roughly how many bytes that saved.
+    output_options selects stream compression and object-stream packing.
+    With preflight, a bad input fails the merge before anything is written;
+    preflight does not keep its readers here (that would hold every input in
+    memory), so each input is parsed again when it is copied.
+    """
+    if len(input_paths) < 2:
+        raise PDFEngineError("Please select at least 2 PDF files to merge.")
+
+    pages_total = (_preflight_inputs(input_paths, cancel).page_count if preflight
+                   else _total_pages(input_paths, progress))
+    reporter = ProgressReporter('merge', pages_total, progress)
+
+    with OutputBatch(fsync) as outputs, outputs.open(output_path) as output_file:
+        stream_writer = StreamingPdfWriter(output_file, dedupe=dedupe, options=output_options)
+
+        def page_written():
+            reporter.advance(1, stream_writer.bytes_written - reporter.bytes_written)
+            _check_cancel(cancel)
+
+        for file_path in input_paths:
+            _check_cancel(cancel)
+            with open_input(file_path) as file:
+                pdf_reader = document_cache.peek(file_path) or _parse(file, file_path)
+                if pdf_reader.is_encrypted and not pdf_reader.decrypt(''):
+                    raise PDFEngineError(f"{os.path.basename(file_path)} is encrypted")
+                stream_writer.add_reader(pdf_reader, on_page=page_written)
+            del pdf_reader
+
+        stream_writer.close()
+
+    return MergeResult(output_path=output_path,
+                       input_count=len(input_paths),
+                       page_count=stream_writer.page_count,
+                       duplicates_removed=stream_writer.duplicates_removed,
+                       bytes_saved=stream_writer.bytes_saved)
+
+
+@pdf_trace.traced('merge')
+def merge_pdfs_incremental(input_paths: Sequence[str], output_path: str,
+                           progress: Optional[ProgressCallback] = None,
+                           cancel: Optional[CancelToken] = None,
+                           dedupe: bool = False,
+                           output_options: Optional[OutputOptions] = None,
+                           fsync: str = FSYNC_NONE,
+                           preflight: bool = True) -> MergeResult:
+    """Merge like merge_pdfs_streaming, reusing whatever the previous run of this merge wrote
+
+    A hidden manifest next to the output records a content hash for every
+    input. When the merge is repeated with the same options, inputs whose
+    content is unchanged keep their existing pages (in any order), and only
+    new or changed inputs are parsed and appended to a copy of the output as
+    an incremental update. Pages of replaced inputs stay in the file without
+    being referenced; once that would be more than half of it, or nothing
+    can be reused, the output is rebuilt from scratch. Preflight only checks
+    the inputs that have to be parsed, or all of them if one cannot be read
+    for hashing.
+    """
+    if len(input_paths) < 2:
+        raise PDFEngineError("Please select at least 2 PDF files to merge.")
+
+    output_options = output_options or OutputOptions()
+    settings = {'dedupe': dedupe, 'compress_level': output_options.compress_level,
+                'object_streams': output_options.object_streams}
+    previous = pdf_incremental.load_manifest(output_path)
+    if previous is not None and previous.options != settings:
+        previous = None
+    try:
+        records = pdf_incremental.hash_inputs(input_paths, previous)
+    except OSError:
+        if not preflight:
+            raise
+        # Report every bad input at once, as a full merge would, rather than the first unreadable one
+        _preflight_inputs(input_paths, cancel)
+        raise
+    plan: List[Optional[pdf_incremental.InputRecord]] = [None] * len(records)
+    if previous is not None:
+        plan = pdf_incremental.plan_reuse(records, previous)
+        if all(old is kept for old, kept in zip(plan, previous.inputs)) and len(plan) == len(previous.inputs):
+            # Same content in the same order: the output is already up to date
+            for record, old in zip(records, plan):
+                record.pages, record.bytes = old.pages, old.bytes
+            previous.inputs = records
+            with OutputBatch(fsync) as outputs, outputs.open(pdf_incremental.manifest_path(output_path)) as file:
+                file.write(previous.to_json())
+            return MergeResult(output_path=output_path, input_count=len(input_paths),
+                               page_count=sum(len(record.pages) for record in records),
+                               inputs_reused=len(records))
+        if not pdf_incremental.worth_appending(previous, plan):
+            previous, plan = None, [None] * len(records)
+
+    new_paths = [record.path for record, old in zip(records, plan) if old is None]
+    if preflight:
+        new_pages = {check.path: check.page_count for check in _preflight_inputs(new_paths, cancel).checks}
+    elif progress is not None:
+        new_pages = {path: probe_page_count(path).page_count for path in new_paths}
+    else:
+        new_pages = dict.fromkeys(new_paths, 0)
+    pages_total = sum(len(old.pages) if old is not None else new_pages[record.path]
+                      for record, old in zip(records, plan))
+    reporter = ProgressReporter('merge', pages_total, progress)
+
+    with OutputBatch(fsync) as outputs:
+        output = outputs.create(output_path)
+        try:
+            if previous is not None:
+                with open(output_path, 'rb') as existing, pdf_trace.span('copy_previous'):
+                    shutil.copyfileobj(existing, output.file, DEFAULT_BUFFER_SIZE)
+            stream_writer = StreamingPdfWriter(output.file, dedupe=dedupe, options=output_options,
+                                               append=previous.append_point if previous is not None else None)
+
+            def page_written():
+                reporter.advance(1, stream_writer.bytes_written - reporter.bytes_written)
+                _check_cancel(cancel)
+
+            for record, old in zip(records, plan):
+                _check_cancel(cancel)
+                if old is not None:
+                    stream_writer.add_existing_pages(old.pages)
+                    record.pages, record.bytes = old.pages, old.bytes
+                    reporter.advance(len(old.pages))
+                    continue
+
+                first_page, start = stream_writer.page_count, stream_writer.bytes_written
+                with open_input(record.path) as file:
+                    pdf_reader = document_cache.peek(record.path) or _parse(file, record.path)
+                    if pdf_reader.is_encrypted and not pdf_reader.decrypt(''):
+                        raise PDFEngineError(f"{os.path.basename(record.path)} is encrypted")
+                    stream_writer.add_reader(pdf_reader, on_page=page_written)
+                del pdf_reader
+                record.pages = stream_writer.page_object_numbers[first_page:]
+                record.bytes = stream_writer.bytes_written - start
+
+            stream_writer.close()
+        except BaseException:
+            output.discard()
+            raise
+        outputs.commit(output, output_path)
+
+        stat = os.stat(output_path)
+        manifest = pdf_incremental.MergeManifest(
+            inputs=records, options=settings, append_point=stream_writer.append_point(),
+            output_size=stat.st_size, output_mtime_ns=stat.st_mtime_ns,
+            dead_bytes=pdf_incremental.unreferenced_bytes(previous, plan) if previous is not None else 0)
+        with outputs.open(pdf_incremental.manifest_path(output_path)) as manifest_file:
+            manifest_file.write(manifest.to_json())
+
+    return MergeResult(output_path=output_path,
+                       input_count=len(input_paths),
+                       page_count=stream_writer.page_count,
+                       duplicates_removed=stream_writer.duplicates_removed,
+                       bytes_saved=stream_writer.bytes_saved,
+                       inputs_reused=sum(1 for old in plan if old is not None))
+
+
+def _write_single_pages(pdf_reader, output_dir: str, base_name: str,
+                        first_page: int, last_page: int, outputs: OutputBatch,
+                        on_page: Optional[Callable[[int], None]] = None,
+                        check_cancel: Optional[Callable[[], None]] = None,
+                        output_options: Optional[OutputOptions] = None) -> List[str]:
+    """Write pages first_page..last_page (1-based, inclusive) as one file each
+
+    on_page(bytes_written) is called after each file is written and
+    check_cancel() before each page is started.
+    """
+    output_paths = []
+    for page_num in range(first_page, last_page + 1):
+        if check_cancel is not None:
+            check_cancel()
+
+        output_path = os.path.join(output_dir, page_output_name(base_name, page_num))
+
+        with outputs.open(output_path) as output_file:
+            stream_writer = StreamingPdfWriter(output_file, options=output_options)
+            stream_writer.add_pages(pdf_reader, [page_num])
+            stream_writer.close()
+            bytes_written = output_file.tell()
+
+        output_paths.append(output_path)
+        if on_page is not None:
+            on_page(bytes_written)
+    return output_paths
+
+
+def _split_output_paths(source_path: str, output_dir: str, page_count: int) -> List[str]:
+    base_name = source_base_name(source_path)
+    return [os.path.join(output_dir, page_output_name(base_name, page_num))
+            for page_num in range(1, page_count + 1)]
+
+
+@pdf_trace.traced('split')
+def split_pdf(source_path: str, output_dir: str,
+              progress: Optional[ProgressCallback] = None,
+              cancel: Optional[CancelToken] = None,
+              output_options: Optional[OutputOptions] = None,
+              fsync: str = FSYNC_NONE) -> SplitResult:
+    """Split source_path into one PDF per page inside output_dir
+
+    Cancellation is checked before each page; pages already written by a
+    cancelled split are removed.
+    """
+    base_name = source_base_name(source_path)
+    result = SplitResult(source_path=source_path, output_dir=output_dir, page_count=0)
+
+    pdf_reader = get_reader(source_path)
+    reporter = ProgressReporter('split', len(pdf_reader.pages), progress)
+    started = time.time()
+    try:
+        with OutputBatch(fsync) as outputs:
+            result.output_paths = _write_single_pages(pdf_reader, output_dir, base_name,
+                                                      1, len(pdf_reader.pages), outputs,
+                                                      on_page=lambda size: reporter.advance(1, size),
+                                                      check_cancel=lambda: _check_cancel(cancel),
+                                                      output_options=output_options)
+    except JobCancelled:
+        _remove_partial_outputs(_split_output_paths(source_path, output_dir, len(pdf_reader.pages)),
+                                started)
+        raise
+
+    result.page_count = len(result.output_paths)
+    return result
+
+
+def page_chunks(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Divide pages 1..page_count into at most `parts` contiguous (first, last) ranges"""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    chunks = []
+    first_page = 1
+    for index in range(parts):
+        last_page = first_page + size - 1 + (1 if index < extra else 0)
+        chunks.append((first_page, last_page))
+        first_page = last_page + 1
+    return chunks
+
+
+# Set in each pool process by _init_split_worker
+_worker_progress_queue = None
+_worker_cancel_event = None
+
+
+def _init_split_worker(progress_queue, cancel_event) -> None:
+    global _worker_progress_queue, _worker_cancel_event
+    _worker_progress_queue = progress_queue
+    _worker_cancel_event = cancel_event
+
+
+def _report_worker_page(bytes_written: int) -> None:
+    if _worker_progress_queue is not None:
+        _worker_progress_queue.put(bytes_written)
+
+
+def _check_worker_cancel() -> None:
+    if _worker_cancel_event is not None and _worker_cancel_event.is_set():
+        raise JobCancelled("Operation cancelled")
+
+
+@pdf_trace.traced('split_chunk')
+def _split_chunk_worker(source_path: str, output_dir: str, first_page: int, last_page: int,
+                        output_options: Optional[OutputOptions] = None,
+                        fsync: str = FSYNC_NONE) -> List[str]:
+    """Process-pool worker: open the source once and write its share of pages"""
+    with open_input(source_path) as file, OutputBatch(fsync) as outputs:
+        pdf_reader = _parse(file, source_path)
+        return _write_single_pages(pdf_reader, output_dir, source_base_name(source_path),
+                                   first_page, last_page, outputs, on_page=_report_worker_page,
+                                   check_cancel=_check_worker_cancel, output_options=output_options)
+
+
+def _watch_workers(futures, progress_queue, reporter: ProgressReporter,
+                   cancel: Optional[CancelToken], cancel_event) -> None:
+    """Forward per-page events and cancellation until every chunk has finished"""
+    while not all(future.done() for future in futures):
+        if cancel is not None and cancel.cancelled:
+            cancel_event.set()
+        if progress_queue is None:
+            wait(futures, timeout=0.1)
+            continue
+        try:
+            reporter.advance(1, progress_queue.get(timeout=0.1))
+        except queue.Empty:
+            pass
+
+    # Events can trail the futures; collect the stragglers of successful runs
+    while progress_queue is not None and reporter.pages_done < reporter.pages_total:
+        if cancel is not None and cancel.cancelled:
+            break
+        try:
+            reporter.advance(1, progress_queue.get(timeout=0.5))
+        except queue.Empty:
+            break
+
+
+def default_workers() -> int:
+    """Default worker count for parallel jobs (the CPU count)"""
+    return os.cpu_count() or 1
+
+
+@pdf_trace.traced('split')
+def split_pdf_parallel(source_path: str, output_dir: str, workers: Optional[int] = None,
+                       progress: Optional[ProgressCallback] = None,
+                       cancel: Optional[CancelToken] = None,
+                       output_options: Optional[OutputOptions] = None,
+                       fsync: str = FSYNC_NONE) -> SplitResult:
+    """Split source_path into one PDF per page, spreading pages across a process pool
+
+    Output file names are identical to split_pdf. Small documents, or a
+    worker count of 1, are split in-process to avoid pool start-up cost.
+    Cancellation reaches every worker before its next page. With the
+    'batch' fsync policy each worker syncs its own pages when it finishes.
+    """
+    workers = workers or default_workers()
+    # Each worker parses the source itself; the parent only needs the page count to size the chunks
+    page_count = probe_page_count(source_path).page_count
+    chunks = page_chunks(page_count, workers)
+
+    if len(chunks) <= 1:
+        return split_pdf(source_path, output_dir, progress=progress, cancel=cancel,
+                         output_options=output_options, fsync=fsync)
+
+    result = SplitResult(source_path=source_path, output_dir=output_dir, page_count=0)
+    reporter = ProgressReporter('split', page_count, progress)
+    progress_queue = multiprocessing.Queue() if progress is not None else None
+    cancel_event = multiprocessing.Event() if cancel is not None else None
+    started = time.time()
+
+    with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_split_worker,
+                             initargs=(progress_queue, cancel_event)) as executor:
+        futures = [executor.submit(_split_chunk_worker, source_path, output_dir, first, last,
+                                   output_options, fsync)
+                   for first, last in chunks]
+        if progress_queue is not None or cancel_event is not None:
+            _watch_workers(futures, progress_queue, reporter, cancel, cancel_event)
+
+    if cancel is not None and cancel.cancelled:
+        _remove_partial_outputs(_split_output_paths(source_path, output_dir, page_count), started)
+        raise JobCancelled("Operation cancelled")
+
+    for future in futures:
+        result.output_paths.extend(future.result())
+
+    result.page_count = len(result.output_paths)
+    return result
+
+
+def _validate_pages(page_numbers: Sequence[int], total_pages: int) -> None:
+    for page_num in page_numbers:
+        if not 1 <= page_num <= total_pages:
+            raise PDFEngineError(f"Page {page_num} is out of range (1-{total_pages})")
+
+
+def _write_page_selection(pdf_reader, page_numbers: Sequence[int], output_path: str,
+                          reporter: ProgressReporter, cancel: Optional[CancelToken],
+                          outputs: OutputBatch, output_options: Optional[OutputOptions] = None) -> None:
+    """Write the selected pages to output_path in a single pass over the source"""
+    with outputs.open(output_path) as output_file:
+        stream_writer = StreamingPdfWriter(output_file, options=output_options)
+
+        def page_written():
+            reporter.advance(1, stream_writer.bytes_written - reporter.bytes_written)
+            _check_cancel(cancel)
+
+        _check_cancel(cancel)
+        stream_writer.add_pages(pdf_reader, page_numbers, on_page=page_written)
+        stream_writer.close()
+        reporter.advance(0, stream_writer.bytes_written - reporter.bytes_written)
+
+
+@pdf_trace.traced('extract')
+def extract_pages(source_path: str, page_numbers: Sequence[int], output_path: str,
+                  progress: Optional[ProgressCallback] = None,
+                  cancel: Optional[CancelToken] = None,
+                  output_options: Optional[OutputOptions] = None,
+                  fsync: str = FSYNC_NONE) -> ExtractResult:
+    """Write the given 1-based page numbers of source_path, in order, to output_path
+
+    Each source page is read once even if it is listed several times.
+    Progress counts distinct source pages copied.
+    """
+    pdf_reader = get_reader(source_path)
+    _validate_pages(page_numbers, len(pdf_reader.pages))
+    reporter = ProgressReporter('extract', len(set(page_numbers)), progress)
+
+    with OutputBatch(fsync) as outputs:
+        _write_page_selection(pdf_reader, page_numbers, output_path, reporter, cancel, outputs, output_options)
+
+    return ExtractResult(source_path=source_path,
+                         output_path=output_path,
+                         page_count=len(page_numbers))
+
+
+@pdf_trace.traced('extract')
+def extract_page_ranges(source_path: str, spec: str, output_path: str,
+                        progress: Optional[ProgressCallback] = None,
+                        cancel: Optional[CancelToken] = None,
+                        output_options: Optional[OutputOptions] = None,
+                        fsync: str = FSYNC_NONE) -> ExtractResult:
+    """Write the pages selected by a spec such as '1-3,7,10-12' to one output file"""
+    page_numbers = parse_page_ranges(spec, count_pages(source_path))
+    return extract_pages(source_path, page_numbers, output_path, progress=progress, cancel=cancel,
+                         output_options=output_options, fsync=fsync)
+
+
+def _write_ranges(pdf_reader, source_path: str, ranges: Sequence[Tuple[int, int]], output_dir: str,
+                  reporter: ProgressReporter, cancel: Optional[CancelToken],
+                  output_options: Optional[OutputOptions] = None,
+                  fsync: str = FSYNC_NONE) -> SplitResult:
+    """Write each (first, last) range to its own range-named file in output_dir"""
+    base_name = source_base_name(source_path)
+    result = SplitResult(source_path=source_path, output_dir=output_dir, page_count=0)
+    started = time.time()
+
+    try:
+        with OutputBatch(fsync) as outputs:
+            for first, last in ranges:
+                output_path = os.path.join(output_dir, range_output_name(base_name, first, last))
+                _write_page_selection(pdf_reader, range(first, last + 1), output_path, reporter, cancel,
+                                      outputs, output_options)
+                result.output_paths.append(output_path)
+                result.page_count += last - first + 1
+    except JobCancelled:
+        _remove_partial_outputs(result.output_paths, started)
+        raise
+
+    return result
+
+
+@pdf_trace.traced('split')
+def split_page_ranges(source_path: str, spec: str, output_dir: str,
+                      progress: Optional[ProgressCallback] = None,
+                      cancel: Optional[CancelToken] = None,
+                      output_options: Optional[OutputOptions] = None,
+                      fsync: str = FSYNC_NONE) -> SplitResult:
+    """Write each range of a spec such as '1-3,7,10-12' to its own file in output_dir
+
+    Files are named {base}_pages_{first}-{last}.pdf ({base}_page_{n}.pdf for
+    single pages). The source is parsed once for all ranges.
+    """
+    pdf_reader = get_reader(source_path)
+    ranges = parse_page_spec(spec, len(pdf_reader.pages))
+    reporter = ProgressReporter('split', sum(last - first + 1 for first, last in ranges), progress)
+    return _write_ranges(pdf_reader, source_path, ranges, output_dir, reporter, cancel, output_options, fsync)
+
+
+def fixed_chunks(page_count: int, pages_per_file: int) -> List[Tuple[int, int]]:
+    """Consecutive 1-based ranges of pages_per_file pages (the last may be shorter)"""
+    if pages_per_file < 1:
+        raise PDFEngineError("Pages per file must be at least 1")
+    return [(first, min(first + pages_per_file - 1, page_count))
+            for first in range(1, page_count + 1, pages_per_file)]
+
+
+@pdf_trace.traced('split')
+def split_pdf_every(source_path: str, output_dir: str, pages_per_file: int,
+                    progress: Optional[ProgressCallback] = None,
+                    cancel: Optional[CancelToken] = None,
+                    output_options: Optional[OutputOptions] = None,
+                    fsync: str = FSYNC_NONE) -> SplitResult:
+    """Split source_path into files of pages_per_file pages each
+
+    Each file is written in one pass; fonts and images shared by its pages
+    are written to it once.
+    """
+    pdf_reader = get_reader(source_path)
+    page_count = len(pdf_reader.pages)
+    ranges = fixed_chunks(page_count, pages_per_file)
+    reporter = ProgressReporter('split', page_count, progress)
+    return _write_ranges(pdf_reader, source_path, ranges, output_dir, reporter, cancel, output_options, fsync)
+
+
+def outline_chunks(pdf_reader) -> List[Tuple[int, int]]:
+    """Ranges starting at each top-level bookmark; pages before the first form their own range"""
+    page_count = len(pdf_reader.pages)
+    starts = set()
+    for item in pdf_reader.outline:
+        # Nested lists hold the children of the preceding bookmark
+        if isinstance(item, list):
+            continue
+        page_index = pdf_reader.get_destination_page_number(item)
+        if page_index >= 0:
+            starts.add(page_index + 1)
+    if not starts:
+        raise PDFEngineError("The PDF has no bookmarks to split on")
+
+    starts.add(1)
+    boundaries = sorted(starts) + [page_count + 1]
+    return [(first, following - 1) for first, following in zip(boundaries, boundaries[1:])]
+
+
+@pdf_trace.traced('split')
+def split_pdf_by_outline(source_path: str, output_dir: str,
+                         progress: Optional[ProgressCallback] = None,
+                         cancel: Optional[CancelToken] = None,
+                         output_options: Optional[OutputOptions] = None,
+                         fsync: str = FSYNC_NONE) -> SplitResult:
+    """Split source_path at its top-level bookmarks (e.g. one file per chapter)"""
+    pdf_reader = get_reader(source_path)
+    try:
+        ranges = outline_chunks(pdf_reader)
+    except PDFEngineError:
+        raise
+    except Exception as e:
+        raise PDFEngineError(f"Could not read the bookmarks of {os.path.basename(source_path)}: {e}") from e
+    reporter = ProgressReporter('split', len(pdf_reader.pages), progress)
+    return _write_ranges(pdf_reader, source_path, ranges, output_dir, reporter, cancel, output_options, fsync)
+
+
+XREF_ENTRY_BYTES = 20
+
+
+def _estimated_size(stream_writer: StreamingPdfWriter) -> int:
+    """Size the file would have if it were closed now (give or take the page tree)"""
+    return stream_writer.bytes_written + XREF_ENTRY_BYTES * stream_writer.object_count
+
+
+@pdf_trace.traced('split')
+def split_pdf_by_size(source_path: str, output_dir: str, max_megabytes: float,
+                      progress: Optional[ProgressCallback] = None,
+                      cancel: Optional[CancelToken] = None,
+                      output_options: Optional[OutputOptions] = None,
+                      fsync: str = FSYNC_NONE) -> SplitResult:
+    """Split source_path into consecutive files of at most about max_megabytes each
+
+    Pages are appended to the current file until the next one would push it
+    past the target. The next page is estimated from the last page that was
+    not first in its file (a first page also carries the shared fonts and
+    images), so until one such page has been seen a file may overshoot by a
+    page. A single page larger than the target gets a file of its own. Files
+    are named by their page range once complete.
+    """
+    if max_megabytes <= 0:
+        raise PDFEngineError("Target size must be greater than 0 MB")
+    max_bytes = int(max_megabytes * 1024 * 1024)
+
+    pdf_reader = get_reader(source_path)
+    page_count = len(pdf_reader.pages)
+    base_name = source_base_name(source_path)
+    reporter = ProgressReporter('split', page_count, progress)
+    result = SplitResult(source_path=source_path, output_dir=output_dir, page_count=0)
+    started = time.time()
+
+    try:
+        with OutputBatch(fsync) as outputs:
+            page_number = 1
+            page_estimate = 0
+            while page_number <= page_count:
+                first = page_number
+                # The range, and so the final name, is only known once the file is full
+                output = outputs.create(os.path.join(output_dir, f"{base_name}_part.pdf"))
+                try:
+                    stream_writer = StreamingPdfWriter(output.file, options=output_options)
+                    while page_number <= page_count:
+                        if (page_number > first
+                                and _estimated_size(stream_writer) + page_estimate > max_bytes):
+                            break
+                        _check_cancel(cancel)
+                        before = stream_writer.bytes_written
+                        stream_writer.add_pages(pdf_reader, [page_number])
+                        page_bytes = stream_writer.bytes_written - before
+                        if page_number > first:
+                            page_estimate = page_bytes
+                        reporter.advance(1, page_bytes)
+                        page_number += 1
+                    stream_writer.close()
+                except BaseException:
+                    output.discard()
+                    raise
+
+                output_path = os.path.join(output_dir, range_output_name(base_name, first, page_number - 1))
+                outputs.commit(output, output_path)
+                result.output_paths.append(output_path)
+                result.page_count += page_number - first
+    except JobCancelled:
+        _remove_partial_outputs(result.output_paths, started)
+        raise
+
+    return result
@@ -0,0 +1,166 @@
+"""
+📋 PDF File List - Virtualized list of selected files
+Only a fixed number of Treeview rows ever exist; scrolling re-labels them with
+the files at the current offset instead of creating a widget per file, so
+showing 10 or 10,000 files costs the same. File sizes and page counts are
+read in the background, for the rows on screen only, and filled in as they
+arrive.
+"""
+
+import os
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pdf_engine
+import pdf_jobs
+
+
+VISIBLE_ROWS = 12
+PENDING_TEXT = '…'
+UNKNOWN_TEXT = '—'
+
+# (size in bytes, page count); None where the file could not be read
+FileDetails = Tuple[Optional[int], Optional[int]]
+
+
+def format_size(size: int) -> str:
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def read_details(path: str) -> FileDetails:
+    """Size and page count of one file, without raising"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return None, None
+    try:
+        pages = pdf_engine.probe_page_count(path).page_count
+    except Exception:
+        pages = None
+    return size, pages
+
+
+class VirtualFileList(ttk.Frame):
+    """Scrollable list of files with number, name, size and page count columns
+
+    `jobs` is the app's JobRunner; details are loaded through it so they never
+    run alongside a merge that shares the parsed-reader cache.
+    """
+
+    COLUMNS = (('#', 60, 'e'), ('name', 420, 'w'), ('size', 90, 'e'), ('pages', 70, 'e'))
+
+    def __init__(self, parent, jobs: pdf_jobs.JobRunner, rows: int = VISIBLE_ROWS, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.jobs = jobs
+        self.rows = rows
+        self.paths: List[str] = []
+        self.top = 0
+        self._details: Dict[str, FileDetails] = {}
+        self._loading = False
+        self._generation = 0
+
+        self.tree = ttk.Treeview(self, columns=[name for name, _, _ in self.COLUMNS], show='headings',
+                                 height=rows, selectmode='none')
+        for name, width, anchor in self.COLUMNS:
+            self.tree.heading(name, text=name.capitalize() if name != '#' else name, anchor=anchor)
+            self.tree.column(name, width=width, anchor=anchor, stretch=(name == 'name'))
+        # The row items are created once and only ever re-labelled
+        self._items = [self.tree.insert('', 'end', values=()) for _ in range(rows)]
+
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        for widget in (self.tree, self.scrollbar):
+            widget.bind('<MouseWheel>', self._on_wheel)
+            widget.bind('<Button-4>', lambda event: self.scroll(-3))
+            widget.bind('<Button-5>', lambda event: self.scroll(3))
+        self.tree.bind('<Prior>', lambda event: self.scroll(-self.rows))
+        self.tree.bind('<Next>', lambda event: self.scroll(self.rows))
+
+    def set_files(self, paths: Sequence[str]) -> None:
+        """Show paths, keeping details already read for files that are still listed"""
+        self.paths = list(paths)
+        self.top = 0
+        self._generation += 1
+        self._details = {path: self._details[path] for path in self.paths if path in self._details}
+        self.tree.configure(height=max(1, min(self.rows, len(self.paths))))
+        self.redraw()
+
+    def scroll(self, delta: int) -> None:
+        self.scroll_to(self.top + delta)
+
+    def scroll_to(self, top: int) -> None:
+        top = max(0, min(top, len(self.paths) - self.rows))
+        if top != self.top:
+            self.top = top
+            self.redraw()
+
+    def redraw(self) -> None:
+        """Re-label the fixed rows for the current offset; cost does not depend on len(paths)"""
+        visible = self.paths[self.top:self.top + self.rows]
+        for offset, item in enumerate(self._items):
+            if offset < len(visible):
+                path = visible[offset]
+                self.tree.item(item, values=self._row_values(self.top + offset + 1, path))
+            else:
+                self.tree.item(item, values=())
+
+        if self.paths:
+            self.scrollbar.set(self.top / len(self.paths), (self.top + len(visible)) / len(self.paths))
+        else:
+            self.scrollbar.set(0, 1)
+        self._load_visible()
+
+    def _row_values(self, number: int, path: str) -> Tuple[str, str, str, str]:
+        details = self._details.get(path)
+        if details is None:
+            size_text = pages_text = PENDING_TEXT
+        else:
+            size, pages = details
+            size_text = format_size(size) if size is not None else UNKNOWN_TEXT
+            pages_text = str(pages) if pages is not None else UNKNOWN_TEXT
+        return str(number), os.path.basename(path), size_text, pages_text
+
+    def _load_visible(self) -> None:
+        """Read details of on-screen files in one background job (one load at a time)"""
+        if self._loading:
+            return
+        missing = [path for path in self.paths[self.top:self.top + self.rows] if path not in self._details]
+        if not missing:
+            return
+        self._loading = True
+        generation = self._generation
+        self.jobs.submit(self._read_while_visible, missing, generation,
+                         on_success=lambda found: self._loaded(found, generation),
+                         on_error=lambda error: self._loaded(dict.fromkeys(missing, (None, None)), generation))
+
+    def _read_while_visible(self, paths: List[str], generation: int) -> Dict[str, FileDetails]:
+        """Read details of paths, stopping early once they have been scrolled away"""
+        found = {}
+        for path in paths:
+            if generation != self._generation or path not in self.paths[self.top:self.top + self.rows]:
+                break
+            found[path] = read_details(path)
+        return found
+
+    def _loaded(self, found: Dict[str, FileDetails], generation: int) -> None:
+        self._loading = False
+        if generation == self._generation:
+            self._details.update(found)
+        # Refresh, which also starts loading rows scrolled into view meanwhile
+        self.redraw()
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        if action == 'moveto':
+            self.scroll_to(round(float(amount) * len(self.paths)))
+        elif action == 'scroll':
+            self.scroll(int(amount) * (self.rows if unit == 'pages' else 1))
+
+    def _on_wheel(self, event: tk.Event) -> None:
+        # Windows reports multiples of 120 per notch; macOS reports small deltas
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-3 * steps)
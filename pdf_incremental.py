@@ -0,0 +1,145 @@
+"""
+🔁 PDF Incremental - Manifests for incremental re-merges
+Next to every incrementally merged output, a small JSON manifest records the
+content hash of each input and which page objects of the output it became.
+When the same merge is run again, inputs with an unchanged hash keep their
+pages as they are, and only new or changed inputs have to be parsed.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from pdf_stream_writer import AppendPoint
+
+
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+# Rebuild from scratch once pages no longer referenced would exceed this share of the output
+COMPACT_RATIO = 0.5
+
+
+@dataclass
+class InputRecord:
+    """One input of a merge and where its pages ended up in the output"""
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    pages: List[int] = field(default_factory=list)  # object numbers of its pages in the output
+    bytes: int = 0                                  # output bytes written for it
+
+
+@dataclass
+class MergeManifest:
+    """What an incrementally merged output was built from"""
+    inputs: List[InputRecord]
+    options: Dict[str, Any]
+    append_point: AppendPoint
+    output_size: int
+    output_mtime_ns: int
+    dead_bytes: int = 0  # bytes of replaced inputs still in the file
+
+    def to_json(self) -> bytes:
+        data = asdict(self)
+        data['version'] = MANIFEST_VERSION
+        return json.dumps(data, indent=1).encode('utf-8')
+
+    @classmethod
+    def from_json(cls, text: bytes) -> 'MergeManifest':
+        data = json.loads(text)
+        if data.pop('version', None) != MANIFEST_VERSION:
+            raise ValueError("Unsupported manifest version")
+        data['inputs'] = [InputRecord(**record) for record in data['inputs']]
+        data['append_point'] = AppendPoint(**data['append_point'])
+        return cls(**data)
+
+
+def manifest_path(output_path: str) -> str:
+    """Hidden manifest file kept next to output_path"""
+    directory, name = os.path.split(output_path)
+    return os.path.join(directory, f".{name}.merge.json")
+
+
+def load_manifest(output_path: str) -> Optional[MergeManifest]:
+    """The manifest of output_path, or None if it is missing, unreadable or out of date
+
+    A manifest is only trusted while the output still has the size and
+    modification time recorded when it was written.
+    """
+    try:
+        with open(manifest_path(output_path), 'rb') as file:
+            manifest = MergeManifest.from_json(file.read())
+        stat = os.stat(output_path)
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+    if (stat.st_size, stat.st_mtime_ns) != (manifest.output_size, manifest.output_mtime_ns):
+        return None
+    return manifest
+
+
+def file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                return hasher.hexdigest()
+            hasher.update(chunk)
+
+
+def hash_inputs(input_paths: Sequence[str], previous: Optional[MergeManifest] = None) -> List[InputRecord]:
+    """Describe each input by content hash
+
+    Files whose path, size and modification time match the previous
+    manifest are not read again.
+    """
+    known = {record.path: record for record in previous.inputs} if previous is not None else {}
+    records = []
+    for input_path in input_paths:
+        path = os.path.abspath(input_path)
+        stat = os.stat(path)
+        old = known.get(path)
+        if old is not None and (old.size, old.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            digest = old.sha256
+        else:
+            digest = file_sha256(path)
+        records.append(InputRecord(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=digest))
+    return records
+
+
+def plan_reuse(records: Sequence[InputRecord], previous: MergeManifest) -> List[Optional[InputRecord]]:
+    """For each input, the previous input with identical content whose pages it can keep
+
+    Each previous input is reused at most once, since a page object can
+    only appear once in the page tree.
+    """
+    available: Dict[str, List[InputRecord]] = {}
+    for old in previous.inputs:
+        available.setdefault(old.sha256, []).append(old)
+    # Prefer the previous input at the same path, then the earliest one
+    plan = []
+    for record in records:
+        candidates = available.get(record.sha256, [])
+        match = next((old for old in candidates if old.path == record.path), None)
+        if match is None and candidates:
+            match = candidates[0]
+        if match is not None:
+            candidates.remove(match)
+        plan.append(match)
+    return plan
+
+
+def unreferenced_bytes(previous: MergeManifest, plan: Sequence[Optional[InputRecord]]) -> int:
+    """Bytes of the output that an update following plan would leave unreferenced"""
+    reused = {id(old) for old in plan if old is not None}
+    return previous.dead_bytes + sum(old.bytes for old in previous.inputs if id(old) not in reused)
+
+
+def worth_appending(previous: MergeManifest, plan: Sequence[Optional[InputRecord]]) -> bool:
+    """Whether an incremental update beats rebuilding the output from scratch"""
+    if not any(old is not None for old in plan):
+        return False
+    return unreferenced_bytes(previous, plan) <= COMPACT_RATIO * previous.output_size
@@ -0,0 +1,141 @@
+"""
+🧵 PDF Jobs - Background work for the Tk apps
+Long operations run on a background executor; their results come back through
+a thread-safe queue that is drained on the Tk thread by a root.after poller,
+so widgets are only ever touched from the main loop.
+"""
+
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+DEFAULT_POLL_MS = 30
+DRAIN_BUDGET_SECONDS = 0.008
+PROGRESS_INTERVAL_SECONDS = 0.1
+
+
+class JobRunner:
+    """Run callables in the background and deliver callbacks on the Tk thread
+
+    `root` is any object with Tk's after() method. A single worker is used by
+    default because parsed readers from pdf_cache are shared and not
+    thread-safe; jobs therefore run one after another in submission order.
+    """
+
+    def __init__(self, root, max_workers: int = 1, poll_ms: int = DEFAULT_POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pdf-job')
+        self._callbacks: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, func: Callable[..., Any], *args: Any,
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               **kwargs: Any) -> Future:
+        """Run func(*args, **kwargs) in the background
+
+        on_success(result) or on_error(exception) is called on the Tk thread.
+        """
+        def run():
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if on_error is not None:
+                    self.post(on_error, e)
+                raise
+            if on_success is not None:
+                self.post(on_success, result)
+            return result
+
+        return self._executor.submit(run)
+
+    def post(self, callback: Callable[..., None], *args: Any) -> None:
+        """Queue callback(*args) to run on the Tk thread (safe from any thread)"""
+        self._callbacks.put((callback, args))
+
+    def shutdown(self, wait: bool = False, cancel_futures: bool = False) -> None:
+        """Stop polling and release the executor
+
+        With cancel_futures, jobs that have not started are dropped. A running
+        job still holds up interpreter exit until it returns, so cancel its
+        CancelToken first.
+        """
+        self._closed = True
+        if cancel_futures and sys.version_info >= (3, 9):
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+        else:
+            self._executor.shutdown(wait=wait)
+
+    def _poll(self) -> None:
+        """Drain queued callbacks within a small time budget, then reschedule"""
+        deadline = time.perf_counter() + DRAIN_BUDGET_SECONDS
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    callback, args = self._callbacks.get_nowait()
+                except queue.Empty:
+                    break
+                callback(*args)
+        finally:
+            if not self._closed:
+                self.root.after(self.poll_ms, self._poll)
+
+
+class ThrottledProgress:
+    """Progress callback that forwards at most one event per interval to the Tk thread
+
+    Engine code may report every page; only the latest event in each
+    interval is kept, so a fast job cannot flood the Tk event loop. An event
+    held back by the throttle is delivered once the interval is over, so the
+    last update before a pause (e.g. the final write) still shows. Call
+    close() from the job's completion callback so nothing arrives after it.
+    """
+
+    def __init__(self, runner: JobRunner, callback: Callable[[Any], None],
+                 interval: float = PROGRESS_INTERVAL_SECONDS):
+        self.runner = runner
+        self.callback = callback
+        self.interval = interval
+        self._latest = None
+        self._last_post = 0.0
+        self._deferred = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Any) -> None:
+        with self._lock:
+            self._latest = event
+            now = time.perf_counter()
+            wait = self._last_post + self.interval - now
+            if wait <= 0:
+                self._last_post = now
+                post = (self._deliver,)
+            elif self._deferred:
+                return
+            else:
+                self._deferred = True
+                self._last_post += self.interval
+                post = (self._deliver_later, int(wait * 1000) + 1)
+        self.runner.post(*post)
+
+    def close(self) -> None:
+        """Drop held-back events; call on the Tk thread once the job has finished"""
+        with self._lock:
+            self._closed = True
+            self._latest = None
+
+    def _deliver_later(self, delay_ms: int) -> None:
+        self.runner.root.after(delay_ms, self._deliver)
+
+    def _deliver(self) -> None:
+        with self._lock:
+            event, self._latest = self._latest, None
+            self._deferred = False
+        if event is not None and not self._closed:
+            self.callback(event)
@@ -0,0 +1,121 @@
+"""
+💾 PDF Output - Atomic, buffered output files
+Every output is written to a hidden temporary file next to its destination
+through a large buffer and renamed into place only once complete, so a crash
+or cancellation never leaves a half-written PDF under its final name. The
+fsync policy trades durability against throughput.
+"""
+
+import os
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List
+
+import pdf_trace
+
+
+FSYNC_NONE = 'none'    # leave flushing to the OS
+FSYNC_FILE = 'file'    # fsync each file (and its folder) as it is completed
+FSYNC_BATCH = 'batch'  # fsync every file of the batch once, when it finishes
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_FILE, FSYNC_BATCH)
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+def _fsync_directory(directory: str) -> None:
+    """Persist a rename; directories cannot be opened for syncing on Windows"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        with pdf_trace.span('fsync'):
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AtomicOutput:
+    """One output being written under a temporary name in its destination folder"""
+
+    def __init__(self, directory: str, name_hint: str, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.temp_path = os.path.join(directory, f".{name_hint}.{uuid.uuid4().hex[:8]}.tmp")
+        # os.open rather than mkstemp so the final file gets the usual umask permissions
+        fd = os.open(self.temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        self.file: BinaryIO = os.fdopen(fd, 'wb', buffering=buffer_size)
+
+    def commit(self, path: str, fsync: bool = False) -> None:
+        """Flush, optionally fsync, and rename the temporary file to path"""
+        try:
+            self.file.flush()
+            pdf_trace.count('bytes', self.file.tell())
+            if fsync:
+                with pdf_trace.span('fsync'):
+                    os.fsync(self.file.fileno())
+        finally:
+            self.file.close()
+        os.replace(self.temp_path, path)
+
+    def discard(self) -> None:
+        """Close and delete the temporary file"""
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+class OutputBatch:
+    """The output files of one job, committed according to an fsync policy
+
+    Use as a context manager; with FSYNC_BATCH every file completed in the
+    batch is synced when the block exits without an error.
+    """
+
+    def __init__(self, fsync: str = FSYNC_NONE, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {', '.join(FSYNC_POLICIES)}")
+        self.fsync = fsync
+        self.buffer_size = buffer_size
+        self.written: List[str] = []
+
+    def __enter__(self) -> 'OutputBatch':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.sync()
+
+    def create(self, path: str) -> AtomicOutput:
+        """Start an output for path (or for a file in path's folder named later)"""
+        directory, name = os.path.split(path)
+        return AtomicOutput(directory, name, self.buffer_size)
+
+    def commit(self, output: AtomicOutput, path: str) -> None:
+        """Move a finished output into place under path"""
+        output.commit(path, fsync=self.fsync == FSYNC_FILE)
+        if self.fsync == FSYNC_FILE:
+            _fsync_directory(os.path.dirname(path))
+        self.written.append(path)
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[BinaryIO]:
+        """Binary file for path that only appears under that name if the block succeeds"""
+        output = self.create(path)
+        try:
+            yield output.file
+        except BaseException:
+            output.discard()
+            raise
+        self.commit(output, path)
+
+    def sync(self) -> None:
+        """With FSYNC_BATCH, sync every file written so far and their folders"""
+        if self.fsync != FSYNC_BATCH:
+            return
+        directories = set()
+        for path in self.written:
+            with open(path, 'rb+') as file, pdf_trace.span('fsync'):
+                os.fsync(file.fileno())
+            directories.add(os.path.dirname(path))
+        for directory in directories:
+            _fsync_directory(directory)
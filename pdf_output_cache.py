@@ -0,0 +1,310 @@
+"""
+🗄️ PDF Output Cache - Reuse the results of repeated jobs
+Finished outputs are kept in a local cache keyed by a hash of the input
+contents, the operation and its settings. Running an identical job again
+hardlinks (or, across file systems, copies) the earlier outputs into place
+instead of processing anything. The cache is bounded in size and evicts the
+least recently used results first.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Dict, Optional, Sequence, TypeVar
+
+from pdf_engine import ExtractResult, MergeResult, SplitResult
+from pdf_incremental import file_sha256
+from pdf_stream_writer import OutputOptions
+
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+CACHE_DIR_ENV = 'PDF_TOOLS_CACHE_DIR'
+KEY_VERSION = 1
+SINGLE_OUTPUT_NAME = 'output.pdf'  # how a one-file result is stored, whatever it was called
+
+RESULT_TYPES = {cls.__name__: cls for cls in (MergeResult, SplitResult, ExtractResult)}
+Result = TypeVar('Result', MergeResult, SplitResult, ExtractResult)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    files TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_by_last_use ON entries (last_used);
+CREATE TABLE IF NOT EXISTS input_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def default_cache_dir() -> str:
+    """$PDF_TOOLS_CACHE_DIR, or pdf_tools/outputs in the user's cache folder"""
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pdf_tools', 'outputs')
+
+
+def output_settings(output_options: Optional[OutputOptions]) -> Dict[str, Any]:
+    """Cache-key settings for the output encoding of a job"""
+    output_options = output_options or OutputOptions()
+    return {'compress_level': output_options.compress_level, 'object_streams': output_options.object_streams}
+
+
+def merge_settings(streaming: bool, dedupe: bool = False,
+                   output_options: Optional[OutputOptions] = None) -> Dict[str, Any]:
+    """Cache-key settings of a merge (merge_pdfs and merge_pdfs_streaming write different files)"""
+    if not streaming:
+        return {'streaming': False}
+    return dict(streaming=True, dedupe=dedupe, **output_settings(output_options))
+
+
+def split_settings(by_outline: bool = False, max_mb: Optional[float] = None, pages_per_file: Optional[int] = None,
+                   output_options: Optional[OutputOptions] = None) -> Dict[str, Any]:
+    """Cache-key settings of a split; all None/False means one file per page"""
+    return dict(by_outline=by_outline, max_mb=float(max_mb) if max_mb else None,
+                pages_per_file=int(pages_per_file) if pages_per_file else None, **output_settings(output_options))
+
+
+@dataclass
+class CacheStats:
+    """Size and effectiveness of an output cache"""
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    bytes_restored: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def describe(self) -> str:
+        return (f"{self.entries} results, {self.bytes / (1024 * 1024):.1f}/{self.max_bytes / (1024 * 1024):.0f} MB • "
+                f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%}) • "
+                f"{self.evictions} evicted • {self.bytes_restored / (1024 * 1024):.1f} MB restored")
+
+
+def _place(source: str, target: str) -> None:
+    """Make target a hardlink to (or, failing that, a copy of) source, replacing it atomically"""
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return
+    temp = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        os.link(source, temp)
+    except OSError:
+        shutil.copyfile(source, temp)
+    os.replace(temp, target)
+
+
+class OutputCache:
+    """On-disk cache of job outputs with an SQLite index"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(self.directory, 'entries'), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, 'staging'), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.directory, 'index.db'), timeout=30, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> 'OutputCache':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # Keys
+
+    def input_hash(self, path: str) -> str:
+        """SHA-256 of a file's contents, remembered while its size and mtime stay the same"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self._db.execute("SELECT sha256 FROM input_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                               (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+        if row is not None:
+            return row['sha256']
+        digest = file_sha256(path)
+        self._db.execute("INSERT OR REPLACE INTO input_hashes VALUES (?, ?, ?, ?)",
+                         (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def job_key(self, operation: str, input_paths: Sequence[str], settings: Dict[str, Any],
+                folder: bool = False) -> str:
+        """Key of a job; folder jobs also depend on input names, which their output names derive from"""
+        description = {
+            'version': KEY_VERSION,
+            'operation': operation,
+            'inputs': [self.input_hash(path) for path in input_paths],
+            'names': [os.path.basename(path) for path in input_paths] if folder else None,
+            'settings': settings,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, 'entries', key[:2], key)
+
+    # Jobs
+
+    def run(self, operation: str, input_paths: Sequence[str], settings: Dict[str, Any], destination: str,
+            produce: Callable[[], Result], folder: bool = False) -> Result:
+        """Restore an identical earlier result to destination, or produce() it and cache it
+
+        destination is the output file, or with folder=True the output
+        folder. Restored results come back with cached=True.
+        """
+        key = self.job_key(operation, input_paths, settings, folder)
+        result = self.fetch(key, destination, input_paths, folder)
+        if result is None:
+            result = produce()
+            self.store(key, result, destination, folder)
+        return result
+
+    def fetch(self, key: str, destination: str, input_paths: Sequence[str], folder: bool = False):
+        """Place the outputs cached under key at destination and return the result, or None on a miss"""
+        row = self._db.execute("SELECT * FROM entries WHERE key = ?", (key,)).fetchone()
+        entry_dir = self._entry_dir(key)
+        files = json.loads(row['files']) if row is not None else []
+
+        # Cached files share their inode with earlier outputs; one edited in place is stale
+        for name, size, mtime_ns in files:
+            try:
+                stat = os.stat(os.path.join(entry_dir, name))
+            except OSError:
+                stat = None
+            if stat is None or (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self._remove(key)
+                row = None
+                break
+        if row is None:
+            self._count('misses')
+            return None
+
+        if folder:
+            os.makedirs(destination, exist_ok=True)
+            targets = [os.path.join(destination, name) for name, _, _ in files]
+        else:
+            targets = [destination]
+        for (name, _, _), target in zip(files, targets):
+            _place(os.path.join(entry_dir, name), target)
+
+        self._db.execute("UPDATE entries SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        self._count('hits')
+        self._count('bytes_restored', row['bytes'])
+
+        stored = json.loads(row['result'])
+        result = RESULT_TYPES[stored.pop('type')](**stored)
+        changes: Dict[str, Any] = {'cached': True}
+        if hasattr(result, 'source_path'):
+            changes['source_path'] = input_paths[0]
+        if folder:
+            changes.update(output_dir=destination, output_paths=targets)
+        else:
+            changes['output_path'] = destination
+        return replace(result, **changes)
+
+    def store(self, key: str, result, destination: str, folder: bool = False) -> None:
+        """Add the outputs of a finished job to the cache"""
+        if folder:
+            sources = [(os.path.relpath(path, destination), path) for path in result.output_paths]
+        else:
+            sources = [(SINGLE_OUTPUT_NAME, destination)]
+        if sum(os.path.getsize(path) for _, path in sources) > self.max_bytes:
+            return
+
+        staging = os.path.join(self.directory, 'staging', uuid.uuid4().hex)
+        files = []
+        try:
+            for name, path in sources:
+                target = os.path.join(staging, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                try:
+                    os.link(path, target)
+                except OSError:
+                    shutil.copyfile(path, target)
+                stat = os.stat(target)
+                files.append((name, stat.st_size, stat.st_mtime_ns))
+
+            entry_dir = self._entry_dir(key)
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            os.replace(staging, entry_dir)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        stored = {'type': type(result).__name__, **asdict(result)}
+        now = time.time()
+        self._db.execute("INSERT OR REPLACE INTO entries (key, files, bytes, result, created, last_used) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (key, json.dumps(files), sum(size for _, size, _ in files), json.dumps(stored), now, now))
+        self.evict()
+
+    # Housekeeping
+
+    def _remove(self, key: str) -> None:
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        entry_dir = self._entry_dir(key)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.rmdir(os.path.dirname(entry_dir))
+        except OSError:
+            pass  # other entries share the prefix folder
+
+    def evict(self) -> None:
+        """Drop least recently used results until the cache fits in max_bytes"""
+        total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row in self._db.execute("SELECT key, bytes FROM entries ORDER BY last_used").fetchall():
+            self._remove(row['key'])
+            self._count('evictions')
+            total -= row['bytes']
+            if total <= self.max_bytes:
+                return
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        self._db.execute("INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                         (name, amount, amount))
+
+    def stats(self) -> CacheStats:
+        counters = {row['name']: row['value'] for row in self._db.execute("SELECT * FROM counters")}
+        entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entries").fetchone()
+        return CacheStats(entries=entries, bytes=total, max_bytes=self.max_bytes,
+                          hits=counters.get('hits', 0), misses=counters.get('misses', 0),
+                          evictions=counters.get('evictions', 0), bytes_restored=counters.get('bytes_restored', 0))
+
+    def clear(self) -> None:
+        """Remove every cached result and reset the statistics"""
+        for row in self._db.execute("SELECT key FROM entries").fetchall():
+            self._remove(row['key'])
+        self._db.execute("DELETE FROM counters")
+        self._db.execute("DELETE FROM input_hashes")
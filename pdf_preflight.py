@@ -0,0 +1,213 @@
+"""
+🛫 PDF Preflight - Check merge inputs before anything is written
+Every input is opened on a process pool and checked to parse, to have a
+readable page tree and to open without a password. Results are cached per
+file version (path, mtime, size), so running a merge again after fixing one
+bad input only checks that file. A merge with any failing input stops before
+its first page is written, with one report listing every problem.
+
+Page counts found here go into pdf_cache.document_cache. With keep_readers
+(used by the in-memory merge, which holds every input anyway), the inputs
+that fit in the document cache are checked in-process through it, so the
+merge reuses their parsed readers instead of parsing them a second time.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import PyPDF2
+
+from pdf_cache import CacheKey, document_cache, document_key, open_input
+import pdf_trace
+from pdf_progress import CancelToken, JobCancelled
+
+
+# Fewer unchecked inputs than this are checked in-process; a pool would take longer to start
+POOL_THRESHOLD = 8
+MAX_CACHED_CHECKS = 10000
+# Pool size when preflight() is not given one; None means the CPU count
+DEFAULT_WORKERS: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class InputCheck:
+    """What preflight found out about one input"""
+    path: str
+    size: int
+    page_count: int
+    encrypted: bool
+    error: Optional[str] = None  # why the file cannot be merged
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class PreflightReport:
+    """Checks of all inputs of one merge, in input order"""
+    checks: List[InputCheck]
+    seconds: float
+    cached: int  # checks answered from the cache
+
+    @property
+    def failures(self) -> List[InputCheck]:
+        return [check for check in self.checks if not check.ok]
+
+    @property
+    def page_count(self) -> int:
+        return sum(check.page_count for check in self.checks)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(check.size for check in self.checks)
+
+    def describe_failures(self, limit: Optional[int] = None) -> str:
+        """e.g. '2 of 300 input files cannot be merged:\\n  #187 scan.pdf: is encrypted ...'"""
+        failures = [(number, check) for number, check in enumerate(self.checks, 1) if not check.ok]
+        lines = [f"{len(failures)} of {len(self.checks)} input files cannot be merged:"]
+        for number, check in failures[:limit]:
+            lines.append(f"  #{number} {os.path.basename(check.path)}: {check.error}")
+        if limit is not None and len(failures) > limit:
+            lines.append(f"  ... and {len(failures) - limit} more")
+        return "\n".join(lines)
+
+
+@pdf_trace.traced('check')
+def check_input(path: str, keep_reader: bool = False) -> InputCheck:
+    """Open path the way a merge would and report whether that will work
+
+    With keep_reader, a file that parses is parsed through the shared
+    document cache and its reader stays there for the merge.
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError as e:
+        return InputCheck(path, 0, 0, False, f"cannot be read ({e.strerror})")
+
+    if keep_reader:
+        try:
+            pdf_reader = document_cache.get_reader(path)
+        except Exception:
+            pass  # checked again below, which tells an encrypted file from a broken one
+        else:
+            return InputCheck(path, size, len(pdf_reader.pages), pdf_reader.is_encrypted)
+
+    encrypted = False
+    try:
+        with open_input(path) as file:
+            with pdf_trace.span('parse', file=os.path.basename(path)):
+                pdf_reader = PyPDF2.PdfReader(file)
+            encrypted = pdf_reader.is_encrypted
+            if encrypted and not pdf_reader.decrypt(''):
+                return InputCheck(path, size, 0, True, "is encrypted (a password is required)")
+            with pdf_trace.span('page_tree'):
+                page_count = len(pdf_reader.pages)
+    except Exception as e:
+        return InputCheck(path, size, 0, encrypted, f"is not a readable PDF ({e or type(e).__name__})")
+    return InputCheck(path, size, page_count, encrypted)
+
+
+class CheckCache:
+    """LRU cache of InputChecks keyed by file version"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_CHECKS):
+        self.max_entries = max_entries
+        self._checks: "OrderedDict[CacheKey, InputCheck]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[InputCheck]:
+        with self._lock:
+            check = self._checks.get(key)
+            if check is not None:
+                self._checks.move_to_end(key)
+            return check
+
+    def put(self, key: CacheKey, check: InputCheck) -> None:
+        with self._lock:
+            self._checks[key] = check
+            self._checks.move_to_end(key)
+            while len(self._checks) > self.max_entries:
+                self._checks.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._checks.clear()
+
+
+check_cache = CheckCache()
+
+
+@pdf_trace.traced('preflight')
+def preflight(input_paths: Sequence[str], workers: Optional[int] = None,
+              cancel: Optional[CancelToken] = None, keep_readers: bool = False) -> PreflightReport:
+    """Check every input, in parallel where it pays off, reusing cached checks
+
+    With keep_readers, the leading inputs that fit in the document cache are
+    checked in-process and their readers kept for the merge; the rest are
+    checked as usual.
+    """
+    start = time.perf_counter()
+    found: Dict[str, InputCheck] = {}
+    keys: Dict[str, CacheKey] = {}
+    cached_count = 0
+    for path in input_paths:
+        if path in found or path in keys:
+            continue
+        try:
+            key = document_key(path)
+        except OSError:
+            found[path] = check_input(path)  # reports the stat error
+            continue
+        cached = check_cache.get(key)
+        if cached is not None:
+            found[path] = cached
+            cached_count += 1
+        else:
+            keys[path] = key
+
+    kept: List[str] = []
+    if keep_readers:
+        # The merge reads inputs in order, so readers of the first ones are kept
+        budget_bytes, budget_entries = document_cache.max_bytes, document_cache.max_entries
+        for path in keys:
+            size = keys[path][2]
+            if len(kept) >= budget_entries or size > budget_bytes:
+                break
+            kept.append(path)
+            budget_bytes -= size
+        for path in kept:
+            if cancel is not None:
+                cancel.check()
+            found[path] = check_input(path, keep_reader=True)
+
+    unchecked = list(keys)[len(kept):]
+    workers = min(workers or DEFAULT_WORKERS or os.cpu_count() or 1, len(unchecked))
+    if workers <= 1 or len(unchecked) < POOL_THRESHOLD:
+        for path in unchecked:
+            if cancel is not None:
+                cancel.check()
+            found[path] = check_input(path)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(check_input, path): path for path in unchecked}
+            for future in as_completed(futures):
+                if cancel is not None and cancel.cancelled:
+                    for pending in futures:
+                        pending.cancel()
+                    raise JobCancelled("Operation cancelled")
+                found[futures[future]] = future.result()
+
+    for path in keys:
+        check_cache.put(keys[path], found[path])
+        if found[path].ok:
+            document_cache.remember_page_count(path, found[path].page_count)
+
+    return PreflightReport(checks=[found[path] for path in input_paths],
+                           seconds=time.perf_counter() - start,
+                           cached=cached_count)
@@ -0,0 +1,138 @@
+"""
+🔬 PDF Profile - Profile one job where it runs
+Runs a single merge/split under cProfile and tracemalloc and leaves the
+results next to its output, so a slow customer file can be investigated
+without copying code out of the app:
+
+    {output}.profile.pstats   cProfile data (python -m pstats, snakeviz, ...)
+    {output}.profile.txt      peak memory, top allocation sites, slowest functions
+
+Allocation sites are taken from a snapshot near the job's memory peak.
+tracemalloc slows the job down noticeably, and only the calling thread is
+profiled, so parallel splits run in-process while profiling.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+TOP_ALLOCATION_SITES = 25
+TOP_FUNCTIONS = 40
+TRACEBACK_FRAMES = 1
+SAMPLE_INTERVAL_SECONDS = 0.25
+# A new peak snapshot is only taken once traced memory grows past the last one by this factor
+SNAPSHOT_GROWTH = 1.1
+
+
+@dataclass
+class ProfileReport:
+    """Where a profiled job's results were written"""
+    stats_path: str
+    report_path: str
+    seconds: float = 0.0
+    peak_bytes: int = 0
+
+
+def profile_paths(output_path: str):
+    """(pstats path, text report path) next to an output file or folder"""
+    base = output_path.rstrip('/\\')
+    stem, extension = os.path.splitext(base)
+    if extension.lower() == '.pdf':
+        base = stem
+    return f"{base}.profile.pstats", f"{base}.profile.txt"
+
+
+class _PeakSampler(threading.Thread):
+    """Keep a tracemalloc snapshot from (close to) the highest traced memory seen"""
+
+    def __init__(self):
+        super().__init__(name='pdf-profile-sampler', daemon=True)
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.snapshot_bytes = 0
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(SAMPLE_INTERVAL_SECONDS):
+            self.sample()
+
+    def sample(self) -> None:
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self.snapshot_bytes * SNAPSHOT_GROWTH:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_bytes = current
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _write_report(report: ProfileReport, label: str, profiler: cProfile.Profile,
+                  sampler: _PeakSampler, current_bytes: int) -> None:
+    snapshot = sampler.snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ))
+    lines = [
+        f"🔬 {label}",
+        f"Wall time: {report.seconds:.2f}s (slowed down by profiling)",
+        f"Peak traced memory: {_megabytes(report.peak_bytes)}",
+        f"Still allocated at the end: {_megabytes(current_bytes)}",
+        "",
+        f"Top allocation sites near the peak ({_megabytes(sampler.snapshot_bytes)} traced):",
+    ]
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATION_SITES]:
+        frame = stat.traceback[0]
+        lines.append(f"  {_megabytes(stat.size):>10}  {stat.count:>9} blocks  {frame.filename}:{frame.lineno}")
+
+    functions = io.StringIO()
+    pstats.Stats(profiler, stream=functions).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    lines += ["", "Slowest functions (cumulative):", functions.getvalue()]
+    with open(report.report_path, 'w', encoding='utf-8') as file:
+        file.write("\n".join(lines))
+
+
+@contextmanager
+def profiled(output_path: str, label: str = 'job') -> Iterator[ProfileReport]:
+    """Run the block under cProfile and tracemalloc, writing the results next to output_path
+
+    The reports are written even if the block fails, since failing jobs are
+    worth profiling too.
+    """
+    stats_path, report_path = profile_paths(output_path)
+    report = ProfileReport(stats_path=stats_path, report_path=report_path)
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(TRACEBACK_FRAMES)
+    elif hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+        tracemalloc.reset_peak()
+    sampler = _PeakSampler()
+    sampler.start()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        report.seconds = time.perf_counter() - start
+        sampler.stop()
+        sampler.sample()
+        current_bytes, report.peak_bytes = tracemalloc.get_traced_memory()
+        if sampler.snapshot is None:
+            sampler.snapshot = tracemalloc.take_snapshot()
+        if not already_tracing:
+            tracemalloc.stop()
+        profiler.dump_stats(stats_path)
+        _write_report(report, label, profiler, sampler, current_bytes)
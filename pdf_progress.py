@@ -0,0 +1,103 @@
+"""
+📈 PDF Progress - Progress and cancellation for long-running operations
+The engine reports pages done and bytes written through a plain callback;
+rates and ETA are derived here so every front end shows the same numbers.
+Jobs are stopped cooperatively through a CancelToken checked between pages.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass
+class Progress:
+    """A snapshot of a running merge/split/extract"""
+    operation: str
+    pages_done: int
+    pages_total: int
+    bytes_written: int
+    elapsed: float
+
+    @property
+    def fraction(self) -> float:
+        if self.pages_total <= 0:
+            return 0.0
+        return min(1.0, self.pages_done / self.pages_total)
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.pages_per_second
+        if rate <= 0:
+            return None
+        return max(0.0, (self.pages_total - self.pages_done) / rate)
+
+    def describe(self) -> str:
+        """Short human-readable summary, e.g. '120/500 pages • 35.2 pages/s • ETA 11s'"""
+        text = f"{self.pages_done}/{self.pages_total} pages • {self.pages_per_second:.1f} pages/s"
+        if self.bytes_written:
+            text += f" • {self.bytes_written / (1024 * 1024):.1f} MB written"
+        eta = self.eta_seconds
+        if eta is not None and self.pages_done < self.pages_total:
+            text += f" • ETA {eta:.0f}s"
+        return text
+
+
+ProgressCallback = Callable[[Progress], None]
+
+
+class JobCancelled(Exception):
+    """Raised inside an operation once its CancelToken has been cancelled"""
+
+
+class CancelToken:
+    """Thread-safe flag asking a running operation to stop at the next page"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        """Raise JobCancelled if cancellation has been requested"""
+        if self._event.is_set():
+            raise JobCancelled("Operation cancelled")
+
+
+class ProgressReporter:
+    """Accumulate work done and forward Progress snapshots to a callback
+
+    A reporter without a callback is a cheap no-op, so engine code can call
+    advance() unconditionally.
+    """
+
+    def __init__(self, operation: str, pages_total: int, callback: Optional[ProgressCallback] = None):
+        self.operation = operation
+        self.pages_total = pages_total
+        self.pages_done = 0
+        self.bytes_written = 0
+        self.callback = callback
+        self._start = time.perf_counter()
+
+    def advance(self, pages: int = 1, bytes_written: int = 0) -> None:
+        self.pages_done += pages
+        self.bytes_written += bytes_written
+        if self.callback is not None:
+            self.callback(self.snapshot())
+
+    def snapshot(self) -> Progress:
+        return Progress(operation=self.operation,
+                        pages_done=self.pages_done,
+                        pages_total=self.pages_total,
+                        bytes_written=self.bytes_written,
+                        elapsed=time.perf_counter() - self._start)
@@ -0,0 +1,314 @@
+"""
+🗃️ PDF Queue - Durable job queue for long batch runs
+The jobs of a manifest are recorded in a SQLite database before any of them
+runs, then move from pending to running to done or failed. If the process
+dies partway through, running the same command again resumes the unfinished
+run: jobs left 'running' by a dead worker go back to pending, and a merge or
+extract whose output was completed before the crash is not redone (split
+jobs and extracts to a folder cannot tell a complete folder from a partial
+one, so they are run again in full). A run is
+only resumed with the manifest contents and options it was recorded with;
+if either changed while it is unfinished, the command refuses to start.
+Several worker processes may share one queue file on a local disk.
+
+Usage:
+    python pdf_tool_desktop.py merge jobs.json --queue night.db   (record and run)
+    python pdf_tool_desktop.py queue night.db                     (resume any unfinished jobs)
+    python pdf_tool_desktop.py queue night.db --status
+    python pdf_tool_desktop.py queue night.db --retry-failed
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import pdf_batch
+import pdf_engine
+from pdf_batch import JobOutcome
+
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+STATES = (PENDING, RUNNING, DONE, FAILED)
+
+# Command-line arguments that say how to run the batch rather than how to run a job
+NON_JOB_OPTIONS = ('operation', 'manifest', 'queue', 'trace')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run INTEGER NOT NULL,
+    manifest TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    operation TEXT NOT NULL,
+    job TEXT NOT NULL,
+    options TEXT NOT NULL,
+    base_dir TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    started REAL,
+    finished REAL,
+    pages INTEGER NOT NULL DEFAULT 0,
+    note TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    fingerprint TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_by_manifest ON jobs (manifest, run);
+"""
+
+
+@dataclass
+class QueuedJob:
+    """A job claimed from the queue"""
+    id: int
+    run: int
+    position: int
+    operation: str
+    job: Dict[str, Any]
+    options: Dict[str, Any]
+    base_dir: str
+    attempts: int  # including this one
+    previous_start: Optional[float]
+
+
+def run_fingerprint(operation: str, jobs: List[Dict[str, Any]], base_dir: str, options: Dict[str, Any]) -> str:
+    """Hash of everything a run was recorded with, to tell an edited manifest from the same one"""
+    recorded = json.dumps([operation, jobs, base_dir, options], sort_keys=True, default=str)
+    return hashlib.sha256(recorded.encode('utf-8')).hexdigest()
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """SQLite-backed queue of manifest jobs"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.worker = _worker_id()
+        # Autocommit mode; claims take an explicit write lock
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = {row['name'] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if 'fingerprint' not in columns:  # queue files from before fingerprints were recorded
+            self._db.execute("ALTER TABLE jobs ADD COLUMN fingerprint TEXT NOT NULL DEFAULT ''")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> 'JobQueue':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def enqueue_manifest(self, manifest_path: str, operation: str, jobs: List[Dict[str, Any]],
+                         base_dir: str, options: Dict[str, Any]) -> int:
+        """Record the jobs of a manifest and return their run number
+
+        If an earlier run of the same manifest still has unfinished jobs, that
+        run is returned instead so it can be resumed. Raises PDFEngineError if
+        that run was recorded with different jobs or options.
+        """
+        manifest = os.path.abspath(manifest_path)
+        fingerprint = run_fingerprint(operation, jobs, base_dir, options)
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT run, fingerprint FROM jobs WHERE manifest = ? AND status IN (?, ?) "
+                "ORDER BY run DESC LIMIT 1",
+                (manifest, PENDING, RUNNING)).fetchone()
+            if row is not None:
+                # Runs recorded before fingerprints existed cannot be compared and are resumed as before
+                if row['fingerprint'] and row['fingerprint'] != fingerprint:
+                    raise pdf_engine.PDFEngineError(
+                        f"Run {row['run']} of {manifest_path} is unfinished and was recorded with different "
+                        f"jobs or options; finish it with 'queue {self.path}' or use another queue file")
+                self._db.execute("COMMIT")
+                return row['run']
+
+            run = self._db.execute("SELECT COALESCE(MAX(run), 0) + 1 FROM jobs").fetchone()[0]
+            self._db.executemany(
+                "INSERT INTO jobs (run, manifest, position, operation, job, options, base_dir, fingerprint) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run, manifest, position, operation, json.dumps(job), json.dumps(options), base_dir, fingerprint)
+                 for position, job in enumerate(jobs, 1)])
+            self._db.execute("COMMIT")
+            return run
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def recover(self) -> int:
+        """Return jobs left 'running' by dead workers on this machine to pending"""
+        host = socket.gethostname()
+        stale = []
+        for row in self._db.execute("SELECT id, worker FROM jobs WHERE status = ?", (RUNNING,)):
+            worker_host, _, pid = (row['worker'] or '').rpartition(':')
+            if worker_host == host and pid.isdigit() and not _process_alive(int(pid)):
+                stale.append((row['id'],))
+        self._db.executemany("UPDATE jobs SET status = 'pending', worker = NULL WHERE id = ? AND status = 'running'",
+                             stale)
+        return len(stale)
+
+    def claim(self, run: Optional[int] = None) -> Optional[QueuedJob]:
+        """Mark the next pending job (of run, if given) as running by this worker and return it"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            query = "SELECT * FROM jobs WHERE status = ?"
+            params: List[Any] = [PENDING]
+            if run is not None:
+                query += " AND run = ?"
+                params.append(run)
+            row = self._db.execute(query + " ORDER BY id LIMIT 1", params).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, started = ?, attempts = attempts + 1 WHERE id = ?",
+                    (RUNNING, self.worker, time.time(), row['id']))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+        if row is None:
+            return None
+        return QueuedJob(id=row['id'], run=row['run'], position=row['position'], operation=row['operation'],
+                         job=json.loads(row['job']), options=json.loads(row['options']),
+                         base_dir=row['base_dir'], attempts=row['attempts'] + 1, previous_start=row['started'])
+
+    def finish(self, job: QueuedJob, outcome: JobOutcome) -> None:
+        self._db.execute(
+            "UPDATE jobs SET status = ?, finished = ?, pages = ?, note = ?, error = ? WHERE id = ?",
+            (DONE if outcome.ok else FAILED, time.time(), outcome.pages, outcome.note, outcome.error, job.id))
+
+    def release(self, job: QueuedJob) -> None:
+        """Put a job this worker gave up on (e.g. on Ctrl+C) back in the queue"""
+        self._db.execute("UPDATE jobs SET status = ?, worker = NULL WHERE id = ? AND status = ?",
+                         (PENDING, job.id, RUNNING))
+
+    def retry_failed(self, run: Optional[int] = None) -> int:
+        """Move failed jobs back to pending; returns how many"""
+        query = "UPDATE jobs SET status = ?, error = NULL WHERE status = ?"
+        params: List[Any] = [PENDING, FAILED]
+        if run is not None:
+            query += " AND run = ?"
+            params.append(run)
+        return self._db.execute(query, params).rowcount
+
+    def counts(self, run: Optional[int] = None) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        query = "SELECT status, COUNT(*) AS total FROM jobs"
+        params: List[Any] = []
+        if run is not None:
+            query += " WHERE run = ?"
+            params.append(run)
+        counts = dict.fromkeys(STATES, 0)
+        for row in self._db.execute(query + " GROUP BY status", params):
+            counts[row['status']] = row['total']
+        return counts
+
+    def failures(self, run: Optional[int] = None) -> List[sqlite3.Row]:
+        query = "SELECT * FROM jobs WHERE status = ?"
+        params: List[Any] = [FAILED]
+        if run is not None:
+            query += " AND run = ?"
+            params.append(run)
+        return self._db.execute(query + " ORDER BY id", params).fetchall()
+
+
+def job_options(options: argparse.Namespace) -> Dict[str, Any]:
+    """The parsed command-line options that affect how each job runs"""
+    return {key: value for key, value in vars(options).items() if key not in NON_JOB_OPTIONS}
+
+
+def _output_path(queued: QueuedJob) -> str:
+    return pdf_batch.resolve_path(queued.base_dir, pdf_batch.job_target(queued.job))
+
+
+def _completed_before_crash(queued: QueuedJob) -> bool:
+    """True if an interrupted single-output job had already committed its output
+
+    Outputs are renamed into place only once complete, so an output newer than
+    the interrupted attempt is a finished one; the comparison allows for the
+    same coarse timestamps as pdf_engine's partial-output cleanup. Jobs
+    writing a folder of files are run again in full, since a folder holding
+    some of its pages looks the same as a finished one.
+    """
+    if queued.attempts <= 1 or queued.previous_start is None or not queued.job.get('output'):
+        return False
+    if queued.operation == 'extract' and queued.job.get('output_dir'):
+        return False
+    try:
+        return os.path.getmtime(_output_path(queued)) >= queued.previous_start - pdf_engine.MTIME_SLACK_SECONDS
+    except OSError:
+        return False
+
+
+def run_queue(queue: JobQueue, run: Optional[int] = None, stream=None) -> List[JobOutcome]:
+    """Run pending jobs (of run, if given) until none are left, printing each result"""
+    stream = stream or sys.stdout
+    queue.recover()
+    outcomes = []
+
+    while True:
+        queued = queue.claim(run)
+        if queued is None:
+            return outcomes
+
+        try:
+            if _completed_before_crash(queued):
+                outcome = JobOutcome(queued.position, queued.operation, _output_path(queued), True,
+                                     note="output already complete")
+            else:
+                options = pdf_batch.default_options(queued.operation, **queued.options)
+                outcome = pdf_batch.run_job(queued.operation, queued.job, queued.base_dir, options,
+                                            queued.position)
+        except BaseException:
+            queue.release(queued)
+            raise
+
+        queue.finish(queued, outcome)
+        outcomes.append(outcome)
+        print(pdf_batch.describe_outcome(outcome), file=stream, flush=True)
+
+
+def print_status(queue: JobQueue, stream=None) -> None:
+    stream = stream or sys.stdout
+    counts = queue.counts()
+    print("📊 " + ", ".join(f"{counts[state]} {state}" for state in STATES), file=stream)
+    for row in queue.failures():
+        print(f"❌ run {row['run']} [{row['position']}] {row['operation']} -> "
+              f"{pdf_batch.job_target(json.loads(row['job'])) or '?'}: {row['error']}", file=stream)
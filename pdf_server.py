@@ -0,0 +1,487 @@
+"""
+🌐 PDF Server - Shared job service over localhost HTTP or a Unix socket
+One long-lived process accepts merge/split/extract jobs and runs them on a
+bounded process pool, so clients share warm workers (and their document
+caches) instead of each starting their own. Jobs use the same keys as batch
+manifest jobs; relative paths are resolved against the server's --root.
+
+Endpoints (JSON bodies and responses):
+    POST   /jobs              {"operation": "merge", "inputs": [...], "output": "ab.pdf",
+                               "options": {"dedupe": true}}  ->  202 with the job status
+    GET    /jobs              status of every job the server still remembers
+    GET    /jobs/<id>         status of one job
+    GET    /jobs/<id>/events  status updates as newline-delimited JSON until the job ends
+    DELETE /jobs/<id>         cancel a queued or running job
+    GET    /health            worker and queue counters
+
+"options" takes the batch command-line options by name (compress_level,
+object_streams, fsync, dedupe, pages_per_file, ...), except those that
+would start their own pools or decide where the server keeps its caches
+and traces (workers, cache_dir, ...). Once max_pending jobs
+are queued or running, new submissions get 503 with a Retry-After header.
+There is no authentication: listen on localhost or on a Unix socket whose
+folder only trusted users can reach.
+
+Usage:
+    python pdf_tool_desktop.py serve --port 8765 --workers 4
+    python pdf_tool_desktop.py serve --unix-socket /run/pdf-tools.sock
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+import pdf_batch
+import pdf_engine
+import pdf_preflight
+from pdf_progress import CancelToken, JobCancelled, Progress
+
+
+DEFAULT_PORT = 8765
+PENDING_PER_WORKER = 4         # default max_pending = workers * PENDING_PER_WORKER
+MAX_FINISHED_JOBS = 1000       # finished jobs kept for status queries
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADERS = 100
+PROGRESS_INTERVAL = 0.25       # seconds between progress messages from a worker
+CANCEL_POLL_INTERVAL = 0.2     # seconds between cancellation checks in a worker
+# Batch options that decide the server's own resource use; clients cannot set them
+SERVER_OPTIONS = ('workers', 'queue', 'trace', 'profile', 'cache_dir', 'cache_max_mb')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+# --- Worker processes -------------------------------------------------------
+
+_progress_queue: Optional[Any] = None
+_cancelled_jobs: Optional[Any] = None
+
+
+def _init_worker(progress_queue, cancelled_jobs) -> None:
+    global _progress_queue, _cancelled_jobs
+    _progress_queue = progress_queue
+    _cancelled_jobs = cancelled_jobs
+    # Jobs already run side by side; preflight checks inside one need no pool of their own
+    pdf_preflight.DEFAULT_WORKERS = 1
+
+
+class _SharedCancel(CancelToken):
+    """CancelToken that follows the server's set of cancelled jobs
+
+    The set lives in a manager process, so it is polled at most every
+    CANCEL_POLL_INTERVAL seconds rather than on every page.
+    """
+
+    def __init__(self, job_id: str):
+        super().__init__()
+        self.job_id = job_id
+        self._next_poll = 0.0
+
+    def check(self) -> None:
+        now = time.monotonic()
+        if now >= self._next_poll:
+            self._next_poll = now + CANCEL_POLL_INTERVAL
+            if self.job_id in _cancelled_jobs:
+                self.cancel()
+        super().check()
+
+
+def _run_job(job_id: str, operation: str, job: Dict[str, Any], overrides: Dict[str, Any],
+             root: str) -> Dict[str, Any]:
+    """Run one job inside a pool worker and return its outcome as a dict"""
+    if operation == 'split':
+        # The server pool already runs jobs side by side
+        overrides = {**overrides, 'workers': 1}
+    options = pdf_batch.default_options(operation, **overrides)
+    last_sent = 0.0
+
+    def report(snapshot: Progress) -> None:
+        nonlocal last_sent
+        now = time.monotonic()
+        if now - last_sent >= PROGRESS_INTERVAL or snapshot.pages_done >= snapshot.pages_total:
+            last_sent = now
+            _progress_queue.put((job_id, snapshot.pages_done, snapshot.pages_total, snapshot.bytes_written))
+
+    outcome = pdf_batch.JOB_RUNNERS[operation](job, root, options, progress=report,
+                                               cancel=_SharedCancel(job_id))
+    return {key: value for key, value in asdict(outcome).items() if key in ('target', 'pages', 'note')}
+
+
+# --- Job bookkeeping --------------------------------------------------------
+
+@dataclass
+class ServerJob:
+    """A job submitted to the server and its latest known status"""
+    id: str
+    operation: str
+    job: Dict[str, Any]
+    options: Dict[str, Any]
+    status: str = QUEUED
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    pages_done: int = 0
+    pages_total: int = 0
+    bytes_written: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def touch(self) -> None:
+        """Wake everyone waiting for this job to change"""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'operation': self.operation,
+            'status': self.status,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'pages_done': self.pages_done,
+            'pages_total': self.pages_total,
+            'bytes_written': self.bytes_written,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class HTTPError(Exception):
+    """An error answered with an HTTP status and a JSON {"error": ...} body"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class JobServer:
+    """Accepts jobs, runs them on a process pool and tracks their status"""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None, root: str = '.'):
+        self.workers = max(1, workers or pdf_engine.default_workers())
+        self.max_pending = max_pending or self.workers * PENDING_PER_WORKER
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.jobs: Dict[str, ServerJob] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._manager = None
+        self._cancelled_jobs = None
+        self._progress_queue = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._tasks = set()
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Start the worker pool; call from inside the event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._manager = multiprocessing.Manager()
+        self._cancelled_jobs = self._manager.dict()
+        self._progress_queue = multiprocessing.Queue()
+        self._pool = self._new_pool()
+        threading.Thread(target=self._forward_progress, name='pdf-server-progress', daemon=True).start()
+
+    def close(self) -> None:
+        """Stop the pool, abandoning queued work"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self._progress_queue, self._cancelled_jobs))
+
+    def _forward_progress(self) -> None:
+        """Hand worker progress messages to the event loop (runs in a thread)"""
+        while True:
+            message = self._progress_queue.get()
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._on_progress, *message)
+
+    def _on_progress(self, job_id: str, pages_done: int, pages_total: int, bytes_written: int) -> None:
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return
+        job.pages_done, job.pages_total, job.bytes_written = pages_done, pages_total, bytes_written
+        job.touch()
+
+    # Jobs
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for job in self.jobs.values() if not job.done)
+
+    def submit(self, payload: Any) -> ServerJob:
+        """Validate a submitted job and queue it"""
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Job must be a JSON object")
+        operation = payload.get('operation')
+        if operation not in pdf_batch.OPERATIONS:
+            raise HTTPError(400, f"'operation' must be one of {', '.join(pdf_batch.OPERATIONS)}")
+        options = payload.get('options') or {}
+        if not isinstance(options, dict):
+            raise HTTPError(400, "'options' must be a JSON object")
+        reserved = [key for key in options if key in SERVER_OPTIONS]
+        if reserved:
+            raise HTTPError(400, f"Option '{reserved[0]}' is set by the server")
+        try:
+            pdf_batch.default_options(operation, **options)
+        except pdf_engine.PDFEngineError as e:
+            raise HTTPError(400, str(e))
+
+        if self.pending >= self.max_pending:
+            raise HTTPError(503, f"Server is busy ({self.max_pending} jobs pending); retry later",
+                            headers={'Retry-After': '1'})
+
+        job = ServerJob(id=uuid.uuid4().hex[:12], operation=operation, options=options,
+                        job={key: value for key, value in payload.items() if key not in ('operation', 'options')})
+        self.jobs[job.id] = job
+        task = self._loop.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def cancel(self, job: ServerJob) -> None:
+        if job.done:
+            return
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED, error="Operation cancelled")
+        else:
+            self._cancelled_jobs[job.id] = True
+
+    async def _run(self, job: ServerJob) -> None:
+        async with self._slots:
+            if job.done:  # cancelled while queued
+                return
+            job.status = RUNNING
+            job.started = time.time()
+            job.touch()
+
+            pool = self._pool
+            try:
+                result = await self._loop.run_in_executor(pool, _run_job, job.id, job.operation, job.job,
+                                                          job.options, self.root)
+            except JobCancelled as e:
+                self._finish(job, CANCELLED, error=str(e))
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); later jobs get a fresh pool
+                if self._pool is pool:
+                    self._pool = self._new_pool()
+                    pool.shutdown(wait=False)
+                self._finish(job, FAILED, error="Worker process exited unexpectedly")
+            except Exception as e:
+                self._finish(job, FAILED, error=str(e))
+            else:
+                self._finish(job, DONE, result=result)
+
+    def _finish(self, job: ServerJob, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished = time.time()
+        if result is not None:
+            job.pages_done = max(job.pages_done, result['pages'])
+        self._cancelled_jobs.pop(job.id, None)
+        job.touch()
+
+        finished = [job_id for job_id, known in self.jobs.items() if known.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def health(self) -> Dict[str, Any]:
+        statuses = [job.status for job in self.jobs.values()]
+        return {
+            'workers': self.workers,
+            'running': statuses.count(RUNNING),
+            'queued': statuses.count(QUEUED),
+            'max_pending': self.max_pending,
+            'jobs': len(statuses),
+        }
+
+    # HTTP
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one request per connection"""
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+                await self._route(method, path, body, writer)
+            except HTTPError as e:
+                _send_json(writer, e.status, {'error': str(e)}, e.headers)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        parts = [part for part in path.split('/') if part]
+
+        if parts == ['health']:
+            _require_method(method, 'GET')
+            _send_json(writer, 200, self.health())
+        elif parts == ['jobs']:
+            _require_method(method, 'GET', 'POST')
+            if method == 'GET':
+                _send_json(writer, 200, {'jobs': [job.to_dict() for job in self.jobs.values()]})
+            else:
+                try:
+                    payload = json.loads(body or b'null')
+                except ValueError as e:
+                    raise HTTPError(400, f"Invalid JSON: {e}")
+                job = self.submit(payload)
+                _send_json(writer, 202, job.to_dict(), {'Location': f"/jobs/{job.id}"})
+        elif len(parts) in (2, 3) and parts[0] == 'jobs' and parts[2:] in ([], ['events']):
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HTTPError(404, f"No job '{parts[1]}'")
+            if len(parts) == 3:
+                _require_method(method, 'GET')
+                await _stream_events(writer, job)
+            else:
+                _require_method(method, 'GET', 'DELETE')
+                if method == 'DELETE':
+                    self.cancel(job)
+                _send_json(writer, 200, job.to_dict())
+        else:
+            raise HTTPError(404, f"No route for {path}")
+
+
+def _require_method(method: str, *allowed: str) -> None:
+    if method not in allowed:
+        raise HTTPError(405, f"Method {method} not allowed", {'Allow': ', '.join(allowed)})
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    """Read one HTTP/1.x request, returning (method, path, body)"""
+    request_line = await reader.readline()
+    try:
+        method, target, _version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(431, "Too many headers")
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length > 0 else b''
+    return method.upper(), target.partition('?')[0], body
+
+
+def _response_head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def _send_json(writer: asyncio.StreamWriter, status: int, payload: Any,
+               headers: Optional[Dict[str, str]] = None) -> None:
+    body = json.dumps(payload).encode('utf-8') + b'\n'
+    writer.write(_response_head(status, {'Content-Type': 'application/json',
+                                         'Content-Length': str(len(body)),
+                                         'Connection': 'close',
+                                         **(headers or {})}) + body)
+
+
+async def _stream_events(writer: asyncio.StreamWriter, job: ServerJob) -> None:
+    """Send the job's status now and after every change, ending once it finishes
+
+    The body is delimited by closing the connection. A slow reader only ever
+    gets the latest status, so intermediate updates coalesce rather than queue.
+    """
+    writer.write(_response_head(200, {'Content-Type': 'application/x-ndjson', 'Connection': 'close'}))
+    while True:
+        changed = job.changed
+        writer.write(json.dumps(job.to_dict()).encode('utf-8') + b'\n')
+        await writer.drain()
+        if job.done:
+            return
+        await changed.wait()
+
+
+async def _serve(host: str, port: int, unix_socket: Optional[str], workers: Optional[int],
+                 max_pending: Optional[int], root: str) -> None:
+    job_server = JobServer(workers, max_pending, root)
+    job_server.start()
+    try:
+        if unix_socket:
+            listener = await asyncio.start_unix_server(job_server.handle_connection, path=unix_socket)
+            address = unix_socket
+        else:
+            listener = await asyncio.start_server(job_server.handle_connection, host, port)
+            address = f"http://{host}:{port}"
+
+        if os.name != 'nt':
+            task = asyncio.current_task()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+
+        print(f"🌐 Serving PDF jobs on {address} with {job_server.workers} workers "
+              f"(up to {job_server.max_pending} pending)", flush=True)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        job_server.close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+
+
+def serve(host: str = '127.0.0.1', port: int = DEFAULT_PORT, unix_socket: Optional[str] = None,
+          workers: Optional[int] = None, max_pending: Optional[int] = None, root: str = '.') -> int:
+    """🚀 Run the job server until interrupted - returns the process exit code"""
+    try:
+        asyncio.run(_serve(host, port, unix_socket, workers, max_pending, root))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return pdf_batch.main(['serve'] + list(argv if argv is not None else sys.argv[1:]))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,590 @@
+"""
+🌊 PDF Stream Writer - Incremental output for large merges
+Writes pages to the output file as soon as they are copied, so only one input
+document has to be held in memory at a time. The page tree, catalog and
+cross-reference table are written once every input has been consumed.
+A writer can also extend an earlier output with an incremental update,
+reusing the pages already in it.
+"""
+
+import hashlib
+import io
+import weakref
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import PyPDF2
+from PyPDF2.generic import (
+    ArrayObject,
+    ContentStream,
+    DecodedStreamObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+)
+
+import pdf_trace
+
+
+PDF_HEADER = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n"
+
+# Page keys that point back into the source document structure
+DROPPED_PAGE_KEYS = ('/Parent', '/B', '/StructParents')
+
+# Resource dictionaries that can be shared between pages and documents;
+# every stream object (fonts files, images, form XObjects, ICC profiles) can too
+SHAREABLE_DICT_TYPES = ('/Font', '/FontDescriptor', '/ExtGState')
+FINGERPRINT_DEPTH = 8
+
+# Objects packed into each object stream when OutputOptions.object_streams is set
+OBJECTS_PER_STREAM = 100
+# Streams smaller than this rarely shrink enough to pay for the filter entry
+MIN_COMPRESS_BYTES = 64
+DEFAULT_COMPRESS_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class AppendPoint:
+    """Where an output of StreamingPdfWriter can be extended by an incremental update"""
+    size: int         # object numbers in use, the trailer /Size
+    pages_num: int    # page tree root; each update rewrites it
+    catalog_num: int
+    xref_offset: int  # start of the last cross-reference section
+
+
+SourceRef = Tuple[int, int]
+Fingerprint = Tuple[bytes, int]  # (digest, bytes of stream data)
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """How StreamingPdfWriter encodes its output
+
+    compress_level: zlib level (1-9) used to Flate-compress streams that are
+    stored uncompressed, typically page content streams; None leaves them
+    as they are. object_streams: pack non-stream objects into compressed
+    object streams indexed by a cross-reference stream (PDF 1.5+).
+    """
+    compress_level: Optional[int] = None
+    object_streams: bool = False
+
+    def __post_init__(self):
+        if self.compress_level is not None and not 1 <= self.compress_level <= 9:
+            raise ValueError("Compression level must be between 1 and 9")
+
+    @property
+    def enabled(self) -> bool:
+        return self.compress_level is not None or self.object_streams
+
+
+# Page references of each reader, so repeated writers over one reader do not rescan its pages
+_page_ref_sets: 'weakref.WeakKeyDictionary[PyPDF2.PdfReader, Set[SourceRef]]' = weakref.WeakKeyDictionary()
+
+
+def _page_refs_of(reader: PyPDF2.PdfReader) -> Set[SourceRef]:
+    page_refs = _page_ref_sets.get(reader)
+    if page_refs is None:
+        page_refs = set()
+        for page in reader.pages:
+            page_ref = page.indirect_reference
+            if page_ref is not None:
+                page_refs.add((page_ref.idnum, page_ref.generation))
+        _page_ref_sets[reader] = page_refs
+    return page_refs
+
+
+class _SourceState:
+    """What has been copied from one source document so far"""
+
+    def __init__(self, reader: PyPDF2.PdfReader):
+        self.reader = reader
+        self.mapping: Dict[SourceRef, int] = {}
+        self.page_refs = _page_refs_of(reader)
+        self.page_nums: Dict[int, int] = {}
+        self.fingerprints: Dict[SourceRef, Optional[Fingerprint]] = {}
+
+
+class StreamingPdfWriter:
+    """Append pages from PdfReaders to a binary output file incrementally
+
+    Objects reachable from each page are copied (renumbered) and written
+    straight away; besides the object offsets and page references, only
+    the renumbering of the most recently added reader is kept.
+
+    With dedupe=True, identical streams (fonts, images, form XObjects, ICC
+    profiles) and font/graphics-state dictionaries are written once and
+    shared, across all added documents. Objects are compared by a SHA-256
+    digest of their contents and of everything they reference;
+    duplicates_removed and bytes_saved report what was skipped.
+
+    OutputOptions can compress uncompressed streams and pack the remaining
+    objects into object streams with a cross-reference stream. Document-level data such as outlines
+    and form fields is not carried over.
+
+    Given an AppendPoint, output_file must already hold that earlier output
+    (positioned at its end); only new objects, a new page tree and a
+    cross-reference section chained to the previous one are written.
+    Pages of the earlier output are kept with add_existing_pages().
+    """
+
+    def __init__(self, output_file: BinaryIO, dedupe: bool = False,
+                 options: Optional[OutputOptions] = None, append: Optional[AppendPoint] = None):
+        self._out = output_file
+        self._append = append
+        self.options = options or OutputOptions()
+        self._packed: List[Tuple[int, object]] = []
+        self._in_object_stream: Dict[int, Tuple[int, int]] = {}
+        self.dedupe = dedupe
+        self.duplicates_removed = 0
+        self.bytes_saved = 0
+        self._shared: Dict[bytes, int] = {}
+        self._page_refs: List[IndirectObject] = []
+        if append is None:
+            self._offsets: List[Optional[int]] = [None]
+            self._out.write(PDF_HEADER)
+            self._pages_num = self._reserve()
+        else:
+            # Offsets stay None for objects of the earlier output, which keep theirs
+            self._offsets = [None] * append.size
+            self._pages_num = append.pages_num
+        self._catalog_num: Optional[int] = None
+        self._xref_offset: Optional[int] = None
+        self._null_num: Optional[int] = None
+        self._source: Optional[_SourceState] = None
+        self._closed = False
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_refs)
+
+    @property
+    def object_count(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def bytes_written(self) -> int:
+        return self._out.tell()
+
+    @property
+    def page_object_numbers(self) -> List[int]:
+        """Object numbers of the output pages, in page order"""
+        return [ref.idnum for ref in self._page_refs]
+
+    def append_point(self) -> AppendPoint:
+        """Where the closed output can be extended by a later incremental update"""
+        if self._xref_offset is None:
+            raise ValueError("append_point() needs a closed writer")
+        return AppendPoint(size=len(self._offsets), pages_num=self._pages_num,
+                           catalog_num=self._catalog_num, xref_offset=self._xref_offset)
+
+    def add_existing_pages(self, page_nums: Sequence[int]) -> None:
+        """Keep pages of the output being extended, given by object number, at this position"""
+        if self._append is None:
+            raise ValueError("add_existing_pages() needs a writer created with an AppendPoint")
+        self._page_refs.extend(IndirectObject(num, 0, None) for num in page_nums)
+
+    def add_reader(self, reader: PyPDF2.PdfReader,
+                   on_page: Optional[Callable[[], None]] = None) -> int:
+        """Copy every page of reader to the output and return the pages added
+
+        The document is always copied afresh, even if the same reader was
+        added before. on_page() is called after each page and everything it
+        references is written.
+        """
+        self._source = None
+        with pdf_trace.span('page_tree'):
+            page_count = len(reader.pages)
+        return self.add_pages(reader, range(1, page_count + 1), on_page=on_page)
+
+    def add_pages(self, reader: PyPDF2.PdfReader, page_numbers: Sequence[int],
+                  on_page: Optional[Callable[[], None]] = None) -> int:
+        """Append the given 1-based pages of reader, in the given order
+
+        Source pages are copied in a single ascending pass and each one only
+        once. A page listed again gets a small page dictionary of its own
+        that shares the already-written contents and resources (without
+        annotations, which belong to a single page). Links to pages that are
+        not selected become null. on_page() is called after each copied page.
+
+        Consecutive calls with the same reader share everything already
+        written, so a document can be appended a few pages at a time without
+        its fonts and images being written more than once.
+        """
+        state = self._source_state(reader)
+        pending: Deque[Tuple[int, IndirectObject]] = deque()
+        pages = reader.pages
+
+        # Reserve numbers for the new pages first so links between them resolve
+        new_pages = sorted(set(page_numbers) - state.page_nums.keys())
+        for page_number in new_pages:
+            num = self._reserve()
+            state.page_nums[page_number] = num
+            page_ref = pages[page_number - 1].indirect_reference
+            if page_ref is not None:
+                state.mapping[(page_ref.idnum, page_ref.generation)] = num
+
+        for page_number in new_pages:
+            with pdf_trace.span('add_page'):
+                page_copy = self._copy_page(pages[page_number - 1], state, pending, DROPPED_PAGE_KEYS)
+                self._write_object(state.page_nums[page_number], page_copy)
+                self._drain(state, pending)
+            pdf_trace.count('pages')
+            if on_page is not None:
+                on_page()
+
+        fresh = set(new_pages)
+        for page_number in page_numbers:
+            if page_number in fresh:
+                fresh.discard(page_number)
+                self._page_refs.append(IndirectObject(state.page_nums[page_number], 0, None))
+                continue
+
+            with pdf_trace.span('add_page', repeat=True):
+                repeat = self._copy_page(pages[page_number - 1], state, pending,
+                                         DROPPED_PAGE_KEYS + ('/Annots',))
+                repeat_num = self._reserve()
+                self._write_object(repeat_num, repeat)
+                self._drain(state, pending)
+            pdf_trace.count('pages')
+            self._page_refs.append(IndirectObject(repeat_num, 0, None))
+
+        return len(page_numbers)
+
+    @pdf_trace.traced('write')
+    def close(self) -> None:
+        """Write the page tree, catalog, xref table and trailer"""
+        if self._closed:
+            return
+        self._closed = True
+        self._source = None
+
+        pages_root = DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(self._page_refs),
+            NameObject('/Count'): NumberObject(len(self._page_refs)),
+        })
+        self._write_object(self._pages_num, pages_root)
+
+        if self._append is not None:
+            # The catalog already points at the (rewritten) page tree root
+            self._catalog_num = self._append.catalog_num
+        else:
+            self._catalog_num = self._reserve()
+            catalog = DictionaryObject({
+                NameObject('/Type'): NameObject('/Catalog'),
+                NameObject('/Pages'): IndirectObject(self._pages_num, 0, None),
+            })
+            self._write_object(self._catalog_num, catalog)
+
+        pdf_trace.count('objects', len(self._offsets) - (self._append.size if self._append is not None else 1))
+        if self.options.object_streams:
+            self._flush_object_stream()
+            self._write_xref_stream()
+            return
+
+        self._xref_offset = self._out.tell()
+        lines = ["xref\n"]
+        for first, count in self._xref_sections():
+            lines.append(f"{first} {count}\n")
+            lines.extend("0000000000 65535 f \n" if num == 0 else f"{self._offsets[num]:010d} 00000 n \n"
+                         for num in range(first, first + count))
+        lines.append(f"trailer\n<< /Size {len(self._offsets)} /Root {self._catalog_num} 0 R"
+                     f"{self._prev_entry()} >>\n")
+        lines.append(f"startxref\n{self._xref_offset}\n%%EOF\n")
+        self._out.write(''.join(lines).encode('ascii'))
+
+    def _xref_sections(self) -> List[Tuple[int, int]]:
+        """(first, count) runs of object numbers the cross-reference section lists
+
+        A complete file lists every number; an update only what it wrote.
+        """
+        if self._append is None:
+            return [(0, len(self._offsets))]
+        sections: List[Tuple[int, int]] = []
+        for num in range(1, len(self._offsets)):
+            if self._offsets[num] is None and num not in self._in_object_stream:
+                continue
+            if sections and sum(sections[-1]) == num:
+                sections[-1] = (sections[-1][0], sections[-1][1] + 1)
+            else:
+                sections.append((num, 1))
+        return sections
+
+    def _prev_entry(self) -> str:
+        return f" /Prev {self._append.xref_offset}" if self._append is not None else ''
+
+    def _reserve(self) -> int:
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write_object(self, num: int, obj) -> None:
+        if self.options.object_streams and not isinstance(obj, StreamObject):
+            self._packed.append((num, obj))
+            if len(self._packed) >= OBJECTS_PER_STREAM:
+                self._flush_object_stream()
+            return
+
+        if self.options.compress_level is not None and isinstance(obj, StreamObject):
+            obj = _deflated(obj, self.options.compress_level)
+        self._offsets[num] = self._out.tell()
+        self._out.write(f"{num} 0 obj\n".encode('ascii'))
+        obj.write_to_stream(self._out, None)
+        self._out.write(b"\nendobj\n")
+
+    def _flush_object_stream(self) -> None:
+        """Write the packed objects as one compressed object stream"""
+        if not self._packed:
+            return
+        packed, self._packed = self._packed, []
+
+        stream_num = self._reserve()
+        header, body = [], io.BytesIO()
+        for index, (num, obj) in enumerate(packed):
+            header.append(f"{num} {body.tell()}")
+            obj.write_to_stream(body, None)
+            body.write(b"\n")
+            self._in_object_stream[num] = (stream_num, index)
+        header_bytes = (' '.join(header) + '\n').encode('ascii')
+
+        object_stream = DecodedStreamObject()
+        object_stream.set_data(header_bytes + body.getvalue())
+        object_stream.update({
+            NameObject('/Type'): NameObject('/ObjStm'),
+            NameObject('/N'): NumberObject(len(packed)),
+            NameObject('/First'): NumberObject(len(header_bytes)),
+        })
+        level = self.options.compress_level or DEFAULT_COMPRESS_LEVEL
+        self._write_object(stream_num, _deflated(object_stream, level, minimum=0))
+
+    def _write_xref_stream(self) -> None:
+        """Finish the file with a cross-reference stream instead of an xref table"""
+        xref_num = self._reserve()
+        self._xref_offset = self._out.tell()
+        self._offsets[xref_num] = self._xref_offset
+
+        size = len(self._offsets)
+        width = max(1, (max(offset or 0 for offset in self._offsets).bit_length() + 7) // 8)
+        rows = bytearray()
+        index = ArrayObject()
+        for first, count in self._xref_sections():
+            index.extend((NumberObject(first), NumberObject(count)))
+            for num in range(first, first + count):
+                if num == 0:
+                    rows += b'\x00' + bytes(width) + b'\xff\xff'  # object 0 heads the free list
+                elif num in self._in_object_stream:
+                    stream_num, position = self._in_object_stream[num]
+                    rows += b'\x02' + stream_num.to_bytes(width, 'big') + position.to_bytes(2, 'big')
+                elif self._offsets[num] is not None:
+                    rows += b'\x01' + self._offsets[num].to_bytes(width, 'big') + b'\x00\x00'
+                else:
+                    rows += b'\x00' + bytes(width) + b'\x00\x00'
+
+        xref_stream = DecodedStreamObject()
+        xref_stream.set_data(bytes(rows))
+        xref_stream.update({
+            NameObject('/Type'): NameObject('/XRef'),
+            NameObject('/Size'): NumberObject(size),
+            NameObject('/W'): ArrayObject([NumberObject(1), NumberObject(width), NumberObject(2)]),
+            NameObject('/Root'): IndirectObject(self._catalog_num, 0, None),
+        })
+        if self._append is not None:
+            xref_stream[NameObject('/Index')] = index
+            xref_stream[NameObject('/Prev')] = NumberObject(self._append.xref_offset)
+        xref_stream = _deflated(xref_stream, self.options.compress_level or DEFAULT_COMPRESS_LEVEL, minimum=0)
+
+        self._out.write(f"{xref_num} 0 obj\n".encode('ascii'))
+        xref_stream.write_to_stream(self._out, None)
+        self._out.write(f"\nendobj\nstartxref\n{self._xref_offset}\n%%EOF\n".encode('ascii'))
+
+    def _source_state(self, reader: PyPDF2.PdfReader) -> '_SourceState':
+        """Return the copy state for reader, starting a new one for a different reader"""
+        if self._source is not None and self._source.reader is reader:
+            return self._source
+
+        state = _SourceState(reader)
+        # References to the source page tree resolve to our own page tree
+        source_pages = reader.trailer['/Root'].get_object().get('/Pages')
+        if isinstance(source_pages, IndirectObject):
+            state.mapping[(source_pages.idnum, source_pages.generation)] = self._pages_num
+        self._source = state
+        return state
+
+    def _null_ref(self) -> IndirectObject:
+        """Shared null object that links to unselected pages point at"""
+        if self._null_num is None:
+            self._null_num = self._reserve()
+            self._write_object(self._null_num, NullObject())
+        return IndirectObject(self._null_num, 0, None)
+
+    def _copy_page(self, page: DictionaryObject, state: '_SourceState',
+                   pending: Deque[Tuple[int, IndirectObject]], skipped: Tuple[str, ...]) -> DictionaryObject:
+        page_copy = DictionaryObject()
+        for key, value in page.items():
+            if key not in skipped:
+                page_copy[NameObject(key)] = self._translate(value, state, pending)
+        page_copy[NameObject('/Parent')] = IndirectObject(self._pages_num, 0, None)
+        return page_copy
+
+    def _drain(self, state: '_SourceState', pending: Deque[Tuple[int, IndirectObject]]) -> None:
+        """Write every object queued by _translate, following references as they appear"""
+        while pending:
+            num, source_ref = pending.popleft()
+            obj = source_ref.get_object()
+            if obj is None:
+                self._write_object(num, NullObject())
+            else:
+                self._write_object(num, self._translate(obj, state, pending))
+
+    def _find_shared(self, ref: IndirectObject, state: '_SourceState') -> Optional[int]:
+        """Output number of an already-written object identical to ref, if any"""
+        fingerprint = self._shareable_fingerprint(ref, state)
+        if fingerprint is None:
+            return None
+        num = self._shared.get(fingerprint[0])
+        if num is not None:
+            self.duplicates_removed += 1
+            self.bytes_saved += fingerprint[1]
+        return num
+
+    def _register_shared(self, ref: IndirectObject, state: '_SourceState', num: int) -> None:
+        fingerprint = self._shareable_fingerprint(ref, state)
+        if fingerprint is not None:
+            self._shared[fingerprint[0]] = num
+
+    def _shareable_fingerprint(self, ref: IndirectObject, state: '_SourceState') -> Optional[Fingerprint]:
+        obj = ref.get_object()
+        if not isinstance(obj, StreamObject) and not (
+                isinstance(obj, DictionaryObject) and obj.get('/Type') in SHAREABLE_DICT_TYPES):
+            return None
+        return self._fingerprint(ref, state, FINGERPRINT_DEPTH)
+
+    def _fingerprint(self, ref: IndirectObject, state: '_SourceState', depth: int) -> Optional[Fingerprint]:
+        """Digest of ref's object and everything it references, or None if it cannot be shared
+
+        Objects that lead back to a page, form a cycle or nest deeper than
+        FINGERPRINT_DEPTH get None, so they are always copied.
+        """
+        key = (ref.idnum, ref.generation)
+        if key in state.fingerprints:
+            return state.fingerprints[key]
+        state.fingerprints[key] = None  # in progress; a cycle back here is not shareable
+        if depth <= 0 or key in state.page_refs:
+            return None
+
+        hasher = hashlib.sha256()
+        weight = self._hash_value(ref.get_object(), hasher, state, depth)
+        fingerprint = (hasher.digest(), weight) if weight is not None else None
+        state.fingerprints[key] = fingerprint
+        return fingerprint
+
+    def _hash_value(self, obj, hasher, state: '_SourceState', depth: int) -> Optional[int]:
+        """Feed obj into hasher; return the stream bytes it covers, or None if not shareable"""
+        if isinstance(obj, IndirectObject):
+            fingerprint = self._fingerprint(obj, state, depth - 1)
+            if fingerprint is None:
+                return None
+            _feed(hasher, b'R', fingerprint[0])
+            return fingerprint[1]
+
+        if isinstance(obj, DictionaryObject):
+            weight = 0
+            _feed(hasher, b'S' if isinstance(obj, StreamObject) else b'D', str(len(obj)).encode())
+            for key in sorted(obj):
+                if key == '/Length':
+                    continue
+                _feed(hasher, b'K', key.encode('utf-8', 'backslashreplace'))
+                value_weight = self._hash_value(obj[key], hasher, state, depth)
+                if value_weight is None:
+                    return None
+                weight += value_weight
+            if isinstance(obj, StreamObject):
+                _feed(hasher, b'B', obj._data)
+                weight += len(obj._data)
+            return weight
+
+        if isinstance(obj, ArrayObject):
+            weight = 0
+            _feed(hasher, b'A', str(len(obj)).encode())
+            for value in obj:
+                value_weight = self._hash_value(value, hasher, state, depth)
+                if value_weight is None:
+                    return None
+                weight += value_weight
+            return weight
+
+        _feed(hasher, type(obj).__name__.encode(), repr(obj).encode('utf-8', 'backslashreplace'))
+        return 0
+
+    def _translate(self, obj, state: '_SourceState', pending: Deque[Tuple[int, IndirectObject]]):
+        """Return a copy of obj whose indirect references use output numbering"""
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            num = state.mapping.get(key)
+            if num is None:
+                if key in state.page_refs:
+                    # A page that has not been selected (yet)
+                    return self._null_ref()
+                if self.dedupe:
+                    num = self._find_shared(obj, state)
+                    if num is not None:
+                        state.mapping[key] = num
+                        return IndirectObject(num, 0, None)
+                num = state.mapping[key] = self._reserve()
+                pending.append((num, obj))
+                if self.dedupe:
+                    self._register_shared(obj, state, num)
+            return IndirectObject(num, 0, None)
+
+        if isinstance(obj, StreamObject):
+            if isinstance(obj, ContentStream):
+                copy = DecodedStreamObject()
+                skipped = ('/Length', '/Filter', '/DecodeParms')
+            else:
+                copy = EncodedStreamObject() if '/Filter' in obj else DecodedStreamObject()
+                skipped = ('/Length',)
+            copy._data = obj._data
+            for key, value in obj.items():
+                if key not in skipped:
+                    copy[NameObject(key)] = self._translate(value, state, pending)
+            return copy
+
+        if isinstance(obj, DictionaryObject):
+            copy = DictionaryObject()
+            for key, value in obj.items():
+                copy[NameObject(key)] = self._translate(value, state, pending)
+            return copy
+
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._translate(value, state, pending) for value in obj)
+
+        return obj
+
+
+def _feed(hasher, tag: bytes, payload: bytes) -> None:
+    """Length-prefixed update so that adjacent values cannot run together"""
+    hasher.update(tag)
+    hasher.update(len(payload).to_bytes(8, 'big'))
+    hasher.update(payload)
+
+
+def _deflated(stream: StreamObject, level: int, minimum: int = MIN_COMPRESS_BYTES) -> StreamObject:
+    """Flate-compressed copy of an unfiltered stream, or the stream itself if that does not help"""
+    if '/Filter' in stream or '/DecodeParms' in stream or len(stream._data) < minimum:
+        return stream
+    data = zlib.compress(stream._data, level)
+    if minimum and len(data) >= len(stream._data):
+        return stream
+
+    encoded = EncodedStreamObject()
+    encoded._data = data
+    for key, value in stream.items():
+        if key != '/Length':
+            encoded[NameObject(key)] = value
+    encoded[NameObject('/Filter')] = NameObject('/FlateDecode')
+    return encoded
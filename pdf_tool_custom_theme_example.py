@@ -1,14 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading
 import os
 import sys
 from pathlib import Path
-import PyPDF2
-from PyPDF2 import PdfReader, PdfWriter
 from datetime import datetime
 
+import pdf_engine
+import pdf_jobs
+from pdf_output import FSYNC_BATCH
+from pdf_progress import CancelToken
+
 class CustomThemePDFApp:
+    # Bad inputs listed in the pre-merge error dialog (the rest are counted)
+    PREFLIGHT_REPORT_LINES = 30
+    
     def __init__(self, root):
         self.root = root
         self.root.title("🌟 PDF Tools - Custom Theme Demo")
@@ -22,8 +27,14 @@ class CustomThemePDFApp:
         self.current_pdf_path = None
         self.current_pdf_pages = 0
         
+        # Background job runner - results come back on the Tk thread
+        self.jobs = pdf_jobs.JobRunner(self.root)
+        # Cancelled when the window closes, so a running job stops at its next page
+        self.closing = CancelToken()
+        
         self.setup_custom_styles()
         self.create_interface()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
     
     def setup_custom_styles(self):
         """🎨 CUSTOM THEME EXAMPLE - Dark Purple with Gold Accents"""
@@ -297,6 +308,16 @@ class CustomThemePDFApp:
                            wraplength=700, justify='left')
         help_text.pack(anchor='w', pady=(0, 25))
         
+        # Output layout - one combined file or one file per range
+        self.split_per_range = tk.BooleanVar(value=False)
+        per_range_check = tk.Checkbutton(self.split_options_frame, 
+                                       text="📂 Save each range as a separate file",
+                                       variable=self.split_per_range,
+                                       font=('Trebuchet MS', 12), bg='#4a4a7a', fg='#e6e6fa',
+                                       selectcolor='#2d1b69', activebackground='#4a4a7a',
+                                       activeforeground='#ffd700')
+        per_range_check.pack(anchor='w', pady=(0, 25))
+        
         self.split_btn = ttk.Button(self.split_options_frame, text="⚡ SPLIT MAGIC ⚡", 
                                   command=self.split_pdf, style='CustomPrimary.TButton')
         self.split_btn.pack(pady=(0, 25))
@@ -380,29 +401,12 @@ class CustomThemePDFApp:
         
         self.merge_btn.config(state='disabled')
         self.show_custom_status(self.merge_status, "⚡ Working PDF Magic... ⚡", "loading")
-        self.root.update()
-        
-        def merge_thread():
-            try:
-                writer = PdfWriter()
-                
-                for file_path in self.selected_files:
-                    with open(file_path, 'rb') as file:
-                        reader = PdfReader(file)
-                        for page in reader.pages:
-                            writer.add_page(page)
-                
-                with open(output_file, 'wb') as output:
-                    writer.write(output)
-                
-                self.root.after(0, lambda: self.merge_complete(output_file))
-                
-            except Exception as e:
-                self.root.after(0, lambda: self.merge_error(str(e)))
-        
-        thread = threading.Thread(target=merge_thread)
-        thread.daemon = True
-        thread.start()
+        
+        # Streaming keeps memory at the size of the largest input rather than all of them
+        self.jobs.submit(pdf_engine.merge_pdfs_streaming, list(self.selected_files), output_file,
+                         fsync=FSYNC_BATCH, cancel=self.closing,
+                         on_success=lambda result: self.merge_complete(result.output_path),
+                         on_error=self.merge_error)
     
     def merge_complete(self, output_file):
         """Handle successful merge with custom styling"""
@@ -410,10 +414,15 @@ class CustomThemePDFApp:
         file_name = os.path.basename(output_file)
         self.show_custom_status(self.merge_status, f"🌟 MAGIC COMPLETE! Saved as: {file_name} ✨", "success")
     
-    def merge_error(self, error_msg):
+    def merge_error(self, error):
         """Handle merge error with custom styling"""
         self.merge_btn.config(state='normal')
-        self.show_custom_status(self.merge_status, f"💥 Magic Failed: {error_msg}", "error")
+        if isinstance(error, pdf_engine.PreflightError):
+            failures = len(error.report.failures)
+            self.show_custom_status(self.merge_status, f"💥 Magic Failed: {failures} files cannot be merged", "error")
+            messagebox.showerror("Magic Error", error.report.describe_failures(limit=self.PREFLIGHT_REPORT_LINES))
+        else:
+            self.show_custom_status(self.merge_status, f"💥 Magic Failed: {str(error)}", "error")
     
     def select_pdf_to_split(self):
         """Select PDF file to split"""
@@ -427,27 +436,90 @@ class CustomThemePDFApp:
             self.analyze_pdf()
     
     def analyze_pdf(self):
-        """Analyze selected PDF and show info with custom styling"""
+        """Analyze selected PDF in the background"""
+        self.show_custom_status(self.split_status, "🔮 Reading your PDF...", "loading")
+        self.jobs.submit(pdf_engine.probe_page_count, self.current_pdf_path,
+                         on_success=self.analyze_complete,
+                         on_error=self.analyze_error)
+    
+    def analyze_complete(self, result):
+        """Show PDF info with custom styling"""
+        if result.source_path != self.current_pdf_path:
+            return  # a newer selection is on its way
+        
+        self.current_pdf_pages = result.page_count
+        self.show_custom_status(self.split_status, "", "")
+        
+        file_name = os.path.basename(self.current_pdf_path)
+        
+        # Show PDF info with custom text
+        self.pdf_info_text.config(state='normal')
+        self.pdf_info_text.delete(1.0, tk.END)
+        info_text = f"📄 Magic File: {file_name}\n📊 Total Pages: {self.current_pdf_pages}\n⚡ Ready for splitting magic!"
+        self.pdf_info_text.insert(1.0, info_text)
+        self.pdf_info_text.config(state='disabled')
+        
+        # Show info and options
+        self.pdf_info_frame.pack(fill='x', pady=(0, 25))
+        self.split_options_frame.pack(fill='x')
+    
+    def analyze_error(self, error):
+        """Handle analysis error with custom styling"""
+        self.show_custom_status(self.split_status, "", "")
+        messagebox.showerror("Magic Error", f"Failed to analyze PDF: {str(error)}")
+    
+    def split_pdf(self):
+        """Extract the requested pages with custom status"""
+        if not self.current_pdf_path:
+            messagebox.showwarning("Magical Warning", "Please choose a PDF to split first.")
+            return
+        
+        spec = self.pages_entry.get().strip()
         try:
-            with open(self.current_pdf_path, 'rb') as file:
-                reader = PdfReader(file)
-                self.current_pdf_pages = len(reader.pages)
-            
-            file_name = os.path.basename(self.current_pdf_path)
-            
-            # Show PDF info with custom text
-            self.pdf_info_text.config(state='normal')
-            self.pdf_info_text.delete(1.0, tk.END)
-            info_text = f"📄 Magic File: {file_name}\n📊 Total Pages: {self.current_pdf_pages}\n⚡ Ready for splitting magic!"
-            self.pdf_info_text.insert(1.0, info_text)
-            self.pdf_info_text.config(state='disabled')
-            
-            # Show info and options
-            self.pdf_info_frame.pack(fill='x', pady=(0, 25))
-            self.split_options_frame.pack(fill='x')
-            
-        except Exception as e:
-            messagebox.showerror("Magic Error", f"Failed to analyze PDF: {str(e)}")
+            pdf_engine.parse_page_spec(spec, self.current_pdf_pages)
+        except pdf_engine.PDFEngineError as e:
+            messagebox.showwarning("Magical Warning", str(e))
+            return
+        
+        if self.split_per_range.get():
+            output_dir = filedialog.askdirectory(title="Choose where to save your page ranges")
+            if not output_dir:
+                return
+            job = (pdf_engine.split_page_ranges, self.current_pdf_path, spec, output_dir)
+        else:
+            output_file = filedialog.asksaveasfilename(
+                title="Save your extracted pages as",
+                defaultextension=".pdf",
+                filetypes=[("PDF files", "*.pdf")]
+            )
+            if not output_file:
+                return
+            job = (pdf_engine.extract_page_ranges, self.current_pdf_path, spec, output_file)
+        
+        self.split_btn.config(state='disabled')
+        self.show_custom_status(self.split_status, "⚡ Extracting your pages... ⚡", "loading")
+        self.jobs.submit(*job, fsync=FSYNC_BATCH, cancel=self.closing,
+                         on_success=self.split_complete, on_error=self.split_error)
+    
+    def split_complete(self, result):
+        """Handle successful extraction with custom styling"""
+        self.split_btn.config(state='normal')
+        if hasattr(result, 'output_paths'):
+            message = f"🌟 MAGIC COMPLETE! {len(result.output_paths)} files saved in {os.path.basename(result.output_dir)} ✨"
+        else:
+            message = f"🌟 MAGIC COMPLETE! {result.page_count} pages saved as: {os.path.basename(result.output_path)} ✨"
+        self.show_custom_status(self.split_status, message, "success")
+    
+    def split_error(self, error):
+        """Handle extraction error with custom styling"""
+        self.split_btn.config(state='normal')
+        self.show_custom_status(self.split_status, f"💥 Magic Failed: {str(error)}", "error")
+    
+    def close(self):
+        """Stop running and queued jobs, then close the window"""
+        self.closing.cancel()
+        self.jobs.shutdown(cancel_futures=True)
+        self.root.destroy()
 
 def main():
     root = tk.Tk()
@@ -3,14 +3,53 @@
 Beautiful desktop application for merging and splitting PDFs with a modern purple interface
 """
 
+import multiprocessing
+import sys
+
+if __name__ == "__main__":
+    # Needed for process-pool workers inside the PyInstaller executable
+    multiprocessing.freeze_support()
+
+    # 📦 Batch mode: `pdf_tool_desktop.py merge|split|extract manifest` runs without Tk
+    if len(sys.argv) > 1:
+        import pdf_batch
+        sys.exit(pdf_batch.main())
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import PyPDF2
 import os
-import threading
+
+import pdf_engine
+import pdf_jobs
+import pdf_profile
+from pdf_file_list import VirtualFileList
+from pdf_output import FSYNC_BATCH
+from pdf_output_cache import OutputCache, merge_settings, split_settings
+from pdf_progress import CancelToken, JobCancelled
 
 
 class ModernPDFToolApp:
+    # Outputs are renamed into place when complete and synced once per job
+    OUTPUT_FSYNC = FSYNC_BATCH
+    # Merges copy page by page with memory bounded by the largest input; set to False
+    # to keep bookmarks and form fields through the in-memory merge (needs every input in memory)
+    STREAMING_MERGE = True
+    # Repeating an identical merge/split restores the earlier result from the output cache
+    USE_OUTPUT_CACHE = True
+    # Bad inputs listed in the pre-merge error dialog (the rest are counted)
+    PREFLIGHT_REPORT_LINES = 30
+    # Hidden toggle (Ctrl+Shift+P) that runs the next merges/splits under pdf_profile;
+    # with Caps Lock on, Shift+P arrives as a lowercase keysym
+    PROFILE_SHORTCUTS = ('<Control-Shift-P>', '<Control-Shift-p>')
+
+    # Split modes offered in the split tab -> what the number box means
+    SPLIT_MODES = {
+        "Single pages": None,
+        "Every N pages": "pages per file",
+        "Files up to N MB": "MB per file",
+        "Bookmarks (chapters)": None,
+    }
+
     def __init__(self, root):
         self.root = root
         self.root.title("🔄 PDF Tools - Desktop")
@@ -21,9 +60,23 @@ class ModernPDFToolApp:
         self.selected_files = []
         self.current_pdf_path = None
         self.current_pdf_pages = 0
+        self.current_pdf_probe_seconds = 0.0
+        self.merge_cancel = None
+        self.split_cancel = None
+        self.merge_dedupe = tk.BooleanVar(value=False)
+        self.compact_output = tk.BooleanVar(value=False)
+        self.split_mode = tk.StringVar(value="Single pages")
+        self.split_amount = tk.StringVar(value="10")
+        self.profile_jobs = False
+        
+        # All long-running work goes through one background job runner
+        self.jobs = pdf_jobs.JobRunner(self.root)
         
         self.setup_styles()
         self.create_interface()
+        for shortcut in self.PROFILE_SHORTCUTS:
+            self.root.bind(shortcut, lambda e: self.toggle_profiling())
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
     
     def setup_styles(self):
         """🎨 Setup beautiful purple theme styles matching the image"""
@@ -129,6 +182,26 @@ class ModernPDFToolApp:
                            foreground=text_purple,
                            background=card_bg,
                            padding=10)
+        
+        # Progress bar - Purple on light gray
+        self.style.configure('Purple.Horizontal.TProgressbar',
+                           troughcolor=button_secondary,
+                           background=bg_primary,
+                           borderwidth=0,
+                           thickness=10)
+
+        # Selected files list - Gray text on white
+        self.style.configure('Treeview',
+                           font=('Segoe UI', 10),
+                           foreground=text_secondary,
+                           background=card_bg,
+                           fieldbackground=card_bg,
+                           rowheight=24)
+
+        self.style.configure('Treeview.Heading',
+                           font=('Segoe UI', 10, 'bold'),
+                           foreground=text_primary,
+                           background=button_secondary)
 
     def create_interface(self):
         """🎨 Create beautiful purple interface matching the design"""
@@ -187,7 +260,19 @@ class ModernPDFToolApp:
         self.files_status = tk.Label(self.files_frame, text="No files selected", 
                                     font=('Segoe UI', 12), 
                                     fg='#6B7280', bg='white')
-        self.files_status.pack()
+        self.files_status.pack(anchor='w', pady=(0, 10))
+        
+        # Only the visible rows exist, so thousands of inputs redraw instantly
+        self.files_list = VirtualFileList(self.files_frame, self.jobs)
+        
+        # Template-generated inputs share fonts and logos; write them once
+        dedupe_check = tk.Checkbutton(card_container,
+                                      text="🧩 Remove duplicate fonts & images (smaller output)",
+                                      variable=self.merge_dedupe,
+                                      font=('Segoe UI', 10), fg='#374151', bg='white',
+                                      activebackground='white', highlightthickness=0)
+        dedupe_check.pack()
+        self.create_compact_check(card_container)
         
         # Action buttons container
         buttons_frame = tk.Frame(card_container, bg='white')
@@ -201,6 +286,14 @@ class ModernPDFToolApp:
                                    state='disabled')
         self.merge_btn.pack(side='left', padx=(0, 15))
         
+        # Cancel button (enabled while a merge is running)
+        self.merge_cancel_btn = ttk.Button(buttons_frame,
+                                          text="⏹ Cancel",
+                                          style='Secondary.TButton',
+                                          command=self.cancel_merge,
+                                          state='disabled')
+        self.merge_cancel_btn.pack(side='left', padx=(0, 15))
+        
         # Clear button (light gray like in image)
         clear_btn = ttk.Button(buttons_frame,
                               text="Clear Files",
@@ -212,6 +305,12 @@ class ModernPDFToolApp:
         self.merge_status = ttk.Label(card_container, text="")
         self.merge_status.pack(pady=10)
         
+        # Progress bar (pages done / total)
+        self.merge_progress = ttk.Progressbar(card_container, 
+                                             style='Purple.Horizontal.TProgressbar',
+                                             mode='determinate', maximum=1.0, length=500)
+        self.merge_progress.pack(pady=(0, 10))
+        
         return frame
     
     def create_split_tab(self):
@@ -231,7 +330,7 @@ class ModernPDFToolApp:
         
         # Subtitle description
         subtitle = ttk.Label(card_container, 
-                           text="Select a PDF file to split it into individual pages.", 
+                           text="Select a PDF file to split it into pages, chunks or chapters.", 
                            style='Subtitle.TLabel')
         subtitle.pack(pady=(0, 30))
         
@@ -242,6 +341,25 @@ class ModernPDFToolApp:
         self.pdf_info_frame = tk.Frame(card_container, bg='white')
         self.pdf_info_frame.pack(fill='x', pady=20)
         
+        # Split mode: single pages, N pages per file, size target or bookmarks
+        mode_frame = tk.Frame(card_container, bg='white')
+        mode_frame.pack()
+        
+        ttk.Label(mode_frame, text="Split into:", style='Subtitle.TLabel').pack(side='left', padx=(0, 10))
+        mode_box = ttk.Combobox(mode_frame, textvariable=self.split_mode, state='readonly',
+                                values=list(self.SPLIT_MODES), width=22)
+        mode_box.pack(side='left', padx=(0, 10))
+        mode_box.bind('<<ComboboxSelected>>', lambda e: self.update_split_mode())
+        
+        self.split_amount_entry = ttk.Entry(mode_frame, textvariable=self.split_amount, width=8)
+        self.split_amount_entry.pack(side='left', padx=(0, 5))
+        self.split_amount_label = ttk.Label(mode_frame, text="", style='Subtitle.TLabel')
+        self.split_amount_label.pack(side='left')
+        self.split_amount.trace_add('write', lambda *args: self.current_pdf_path and self.update_pdf_info_display())
+        self.update_split_mode()
+        
+        self.create_compact_check(card_container)
+        
         # Action buttons container
         buttons_frame = tk.Frame(card_container, bg='white')
         buttons_frame.pack(pady=(20, 30))
@@ -259,14 +377,51 @@ class ModernPDFToolApp:
                                    style='Primary.TButton',
                                    command=self.split_pdf,
                                    state='disabled')
-        self.split_btn.pack(side='left')
+        self.split_btn.pack(side='left', padx=(0, 15))
+        
+        # Cancel button (enabled while a split is running)
+        self.split_cancel_btn = ttk.Button(buttons_frame,
+                                          text="⏹ Cancel",
+                                          style='Secondary.TButton',
+                                          command=self.cancel_split,
+                                          state='disabled')
+        self.split_cancel_btn.pack(side='left')
         
         # Status area
         self.split_status = ttk.Label(card_container, text="")
         self.split_status.pack(pady=10)
         
+        # Progress bar (pages done / total)
+        self.split_progress = ttk.Progressbar(card_container, 
+                                             style='Purple.Horizontal.TProgressbar',
+                                             mode='determinate', maximum=1.0, length=500)
+        self.split_progress.pack(pady=(0, 10))
+        
         return frame
     
+    def create_compact_check(self, parent):
+        """⚡ Checkbox for compressed output, shared by the merge and split tabs"""
+        compact_check = tk.Checkbutton(parent,
+                                       text="⚡ Compact output (compressed streams, object streams)",
+                                       variable=self.compact_output,
+                                       font=('Segoe UI', 10), fg='#374151', bg='white',
+                                       activebackground='white', highlightthickness=0)
+        compact_check.pack()
+    
+    def output_options(self):
+        """Engine output options for the current compact-output setting"""
+        if not self.compact_output.get():
+            return None
+        return pdf_engine.OutputOptions(compress_level=pdf_engine.DEFAULT_COMPRESS_LEVEL, object_streams=True)
+    
+    def update_split_mode(self):
+        """Show the number box only for modes that need one"""
+        unit = self.SPLIT_MODES[self.split_mode.get()]
+        self.split_amount_entry.config(state='normal' if unit else 'disabled')
+        self.split_amount_label.config(text=unit or "")
+        if self.current_pdf_path:
+            self.update_pdf_info_display()
+    
     def create_drop_area(self, parent, mode):
         """☁️ Create drag and drop area like in the image"""
         # Dashed border container (like in the image)
@@ -333,36 +488,14 @@ class ModernPDFToolApp:
 
     def update_files_display(self):
         """Update the display of selected files"""
-        # Clear existing display
-        for widget in self.files_frame.winfo_children():
-            widget.destroy()
-        
         if self.selected_files:
-            # Show file count
-            count_text = f"{len(self.selected_files)} files selected:"
-            count_label = tk.Label(self.files_frame, text=count_text, 
-                                  font=('Segoe UI', 12, 'bold'), 
-                                  fg='#374151', bg='white')
-            count_label.pack(anchor='w', pady=(0, 10))
-            
-            # Show files in a scrollable list
-            files_container = tk.Frame(self.files_frame, bg='white')
-            files_container.pack(fill='both', expand=True)
-            
-            for i, file_path in enumerate(self.selected_files, 1):
-                file_name = os.path.basename(file_path)
-                file_label = tk.Label(files_container, 
-                                     text=f"{i}. {file_name}", 
-                                     font=('Segoe UI', 10),
-                                     fg='#6B7280', bg='white',
-                                     anchor='w')
-                file_label.pack(fill='x', pady=2, padx=20)
+            self.files_status.config(text=f"{len(self.selected_files)} files selected:",
+                                     font=('Segoe UI', 12, 'bold'), fg='#374151')
+            self.files_list.pack(fill='x', padx=20)
         else:
-            # Show "No files selected"
-            self.files_status = tk.Label(self.files_frame, text="No files selected", 
-                                        font=('Segoe UI', 12), 
-                                        fg='#6B7280', bg='white')
-            self.files_status.pack()
+            self.files_status.config(text="No files selected", font=('Segoe UI', 12), fg='#6B7280')
+            self.files_list.pack_forget()
+        self.files_list.set_files(self.selected_files)
 
     def clear_files(self):
         """Clear all selected files"""
@@ -379,18 +512,27 @@ class ModernPDFToolApp:
         )
         
         if file_path:
-            try:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    self.current_pdf_pages = len(pdf_reader.pages)
-                    self.current_pdf_path = file_path
-                
-                # Update display
-                self.update_pdf_info_display()
-                self.split_btn.config(state='normal')
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to read PDF: {str(e)}")
+            self.split_btn.config(state='disabled')
+            self.show_status(self.split_status, f"Reading {os.path.basename(file_path)}...", "loading")
+            
+            self.jobs.submit(pdf_engine.probe_page_count, file_path,
+                             on_success=self.pdf_probed,
+                             on_error=self.pdf_probe_failed)
+
+    def pdf_probed(self, result):
+        """Show the probed PDF once its page count is known (Tk thread)"""
+        self.current_pdf_path = result.source_path
+        self.current_pdf_pages = result.page_count
+        self.current_pdf_probe_seconds = result.seconds
+        
+        self.update_pdf_info_display()
+        self.split_btn.config(state='normal')
+        self.show_status(self.split_status, "", "loading")
+
+    def pdf_probe_failed(self, error):
+        """Report a PDF that could not be read (Tk thread)"""
+        self.show_status(self.split_status, "", "loading")
+        messagebox.showerror("Error", f"Failed to read PDF: {str(error)}")
 
     def update_pdf_info_display(self):
         """Update the PDF info display"""
@@ -409,12 +551,30 @@ class ModernPDFToolApp:
             info_label.pack(anchor='w', pady=(0, 5))
             
             # Pages info
-            pages_text = f"📋 {self.current_pdf_pages} pages • Will be split into {self.current_pdf_pages} separate files"
+            pages_text = (f"📋 {self.current_pdf_pages} pages • {self.describe_split_outcome()}"
+                          f" • read in {self.current_pdf_probe_seconds * 1000:.0f} ms")
             pages_label = tk.Label(self.pdf_info_frame, text=pages_text, 
                                   font=('Segoe UI', 10),
                                   fg='#6B7280', bg='white')
             pages_label.pack(anchor='w')
 
+    def describe_split_outcome(self):
+        """One-line preview of what the chosen split mode will produce"""
+        mode = self.split_mode.get()
+        if mode == "Single pages":
+            return f"Will be split into {self.current_pdf_pages} separate files"
+        if mode == "Every N pages":
+            try:
+                pages_per_file = int(self.split_amount.get())
+            except ValueError:
+                return "Enter the number of pages per file"
+            if pages_per_file < 1:
+                return "Enter the number of pages per file"
+            return f"Will be split into {-(-self.current_pdf_pages // pages_per_file)} files"
+        if mode == "Files up to N MB":
+            return "Will be split into files of the chosen size"
+        return "Will be split at each top-level bookmark"
+
     def merge_pdfs(self):
         """Merge selected PDF files"""
         if len(self.selected_files) < 2:
@@ -430,28 +590,69 @@ class ModernPDFToolApp:
         if not output_path:
             return
         
+        selected_files = list(self.selected_files)
+        dedupe = self.merge_dedupe.get()
+        output_options = self.output_options()
+        cancel = self.merge_cancel = CancelToken()
+        progress = pdf_jobs.ThrottledProgress(
+            self.jobs, lambda event: self.show_progress(self.merge_status, self.merge_progress,
+                                                        "Merging PDFs...", event))
+        
+        fsync = self.OUTPUT_FSYNC
+        profile = self.profile_jobs
+        
+        streaming = bool(self.STREAMING_MERGE or dedupe or output_options)
+        
+        def merge():
+            if streaming:
+                return pdf_engine.merge_pdfs_streaming(selected_files, output_path, progress=progress,
+                                                       cancel=cancel, dedupe=dedupe,
+                                                       output_options=output_options, fsync=fsync)
+            return pdf_engine.merge_pdfs(selected_files, output_path, progress=progress, cancel=cancel,
+                                         fsync=fsync)
+        
         def merge_thread():
-            try:
-                self.show_status(self.merge_status, "Merging PDFs...", "loading")
-                
-                pdf_merger = PyPDF2.PdfMerger()
-                
-                for file_path in self.selected_files:
-                    pdf_merger.append(file_path)
-                
-                with open(output_path, 'wb') as output_file:
-                    pdf_merger.write(output_file)
-                
-                pdf_merger.close()
-                
-                self.show_status(self.merge_status, 
-                               f"✅ Successfully merged {len(self.selected_files)} PDFs into {os.path.basename(output_path)}", 
-                               "success")
-                
-            except Exception as e:
-                self.show_status(self.merge_status, f"❌ Error merging PDFs: {str(e)}", "error")
-        
-        threading.Thread(target=merge_thread, daemon=True).start()
+            if profile:
+                with pdf_profile.profiled(output_path, "merge"):
+                    return merge()
+            if not self.USE_OUTPUT_CACHE:
+                return merge()
+            with OutputCache() as cache:
+                return cache.run('merge', selected_files, merge_settings(streaming, dedupe, output_options),
+                                 output_path, merge)
+        
+        def merge_done(result):
+            progress.close()
+            self.merge_cancel_btn.config(state='disabled')
+            self.merge_progress.config(value=1.0)
+            message = f"✅ Successfully merged {result.input_count} PDFs into {os.path.basename(result.output_path)}"
+            if result.cached:
+                message += " • reused an identical earlier merge"
+            elif result.duplicates_removed:
+                message += (f" • {result.duplicates_removed} duplicate resources removed, "
+                            f"{result.bytes_saved / (1024 * 1024):.1f} MB saved")
+            if profile:
+                message += f" • profile: {os.path.basename(pdf_profile.profile_paths(output_path)[1])}"
+            self.show_status(self.merge_status, message, "success")
+        
+        def merge_failed(error):
+            progress.close()
+            self.merge_cancel_btn.config(state='disabled')
+            self.merge_progress.config(value=0)
+            if isinstance(error, JobCancelled):
+                self.show_status(self.merge_status, "⏹ Merge cancelled", "error")
+            elif isinstance(error, pdf_engine.PreflightError):
+                failures = len(error.report.failures)
+                self.show_status(self.merge_status, f"❌ {failures} input files cannot be merged", "error")
+                messagebox.showerror("Cannot merge",
+                                     error.report.describe_failures(limit=self.PREFLIGHT_REPORT_LINES))
+            else:
+                self.show_status(self.merge_status, f"❌ Error merging PDFs: {str(error)}", "error")
+        
+        self.merge_cancel_btn.config(state='normal')
+        self.merge_progress.config(value=0)
+        self.show_status(self.merge_status, "Merging PDFs...", "loading")
+        self.jobs.submit(merge_thread, on_success=merge_done, on_error=merge_failed)
 
     def split_pdf(self):
         """Split the selected PDF into individual pages"""
@@ -459,36 +660,111 @@ class ModernPDFToolApp:
             messagebox.showerror("Error", "Please select a PDF file to split.")
             return
         
+        mode = self.split_mode.get()
+        amount = None
+        if self.SPLIT_MODES[mode]:
+            try:
+                amount = float(self.split_amount.get())
+            except ValueError:
+                amount = 0
+            if amount <= 0 or (mode == "Every N pages" and amount != int(amount)):
+                messagebox.showerror("Error", f"Please enter a valid number of {self.SPLIT_MODES[mode]}.")
+                return
+        
         output_dir = filedialog.askdirectory(title="Choose directory to save split pages")
         
         if not output_dir:
             return
         
+        source_path = self.current_pdf_path
+        output_options = self.output_options()
+        cancel = self.split_cancel = CancelToken()
+        progress = pdf_jobs.ThrottledProgress(
+            self.jobs, lambda event: self.show_progress(self.split_status, self.split_progress,
+                                                        "Splitting PDF...", event))
+        
+        write_options = dict(progress=progress, cancel=cancel, output_options=output_options,
+                             fsync=self.OUTPUT_FSYNC)
+        profile = self.profile_jobs
+        
+        def split():
+            if mode == "Every N pages":
+                return pdf_engine.split_pdf_every(source_path, output_dir, int(amount), **write_options)
+            if mode == "Files up to N MB":
+                return pdf_engine.split_pdf_by_size(source_path, output_dir, amount, **write_options)
+            if mode == "Bookmarks (chapters)":
+                return pdf_engine.split_pdf_by_outline(source_path, output_dir, **write_options)
+            # Only this process is profiled, so a profiled split keeps its pages here
+            workers = 1 if profile else None
+            return pdf_engine.split_pdf_parallel(source_path, output_dir, workers=workers, **write_options)
+        
         def split_thread():
-            try:
-                self.show_status(self.split_status, "Splitting PDF...", "loading")
-                
-                with open(self.current_pdf_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    base_name = os.path.splitext(os.path.basename(self.current_pdf_path))[0]
-                    
-                    for page_num, page in enumerate(pdf_reader.pages, 1):
-                        pdf_writer = PyPDF2.PdfWriter()
-                        pdf_writer.add_page(page)
-                        
-                        output_path = os.path.join(output_dir, f"{base_name}_page_{page_num}.pdf")
-                        
-                        with open(output_path, 'wb') as output_file:
-                            pdf_writer.write(output_file)
-                
-                self.show_status(self.split_status, 
-                               f"✅ Successfully split PDF into {self.current_pdf_pages} files in {os.path.basename(output_dir)}", 
-                               "success")
-                
-            except Exception as e:
-                self.show_status(self.split_status, f"❌ Error splitting PDF: {str(e)}", "error")
-        
-        threading.Thread(target=split_thread, daemon=True).start()
+            if profile:
+                with pdf_profile.profiled(output_dir, "split"):
+                    return split()
+            if not self.USE_OUTPUT_CACHE:
+                return split()
+            settings = split_settings(by_outline=mode == "Bookmarks (chapters)",
+                                      max_mb=amount if mode == "Files up to N MB" else None,
+                                      pages_per_file=amount if mode == "Every N pages" else None,
+                                      output_options=output_options)
+            with OutputCache() as cache:
+                return cache.run('split', [source_path], settings, output_dir, split, folder=True)
+        
+        def split_done(result):
+            progress.close()
+            self.split_cancel_btn.config(state='disabled')
+            self.split_progress.config(value=1.0)
+            message = f"✅ Successfully split PDF into {len(result.output_paths)} files in {os.path.basename(result.output_dir)}"
+            if result.cached:
+                message += " • reused an identical earlier split"
+            if profile:
+                message += f" • profile: {os.path.basename(pdf_profile.profile_paths(output_dir)[1])}"
+            self.show_status(self.split_status, message, "success")
+        
+        def split_failed(error):
+            progress.close()
+            self.split_cancel_btn.config(state='disabled')
+            self.split_progress.config(value=0)
+            if isinstance(error, JobCancelled):
+                self.show_status(self.split_status, "⏹ Split cancelled - partial pages removed", "error")
+            else:
+                self.show_status(self.split_status, f"❌ Error splitting PDF: {str(error)}", "error")
+        
+        self.split_cancel_btn.config(state='normal')
+        self.split_progress.config(value=0)
+        self.show_status(self.split_status, "Splitting PDF...", "loading")
+        self.jobs.submit(split_thread, on_success=split_done, on_error=split_failed)
+
+    def cancel_merge(self):
+        """Ask the running merge to stop"""
+        if self.merge_cancel is not None:
+            self.merge_cancel.cancel()
+            self.merge_cancel_btn.config(state='disabled')
+            self.show_status(self.merge_status, "Cancelling merge...", "loading")
+
+    def cancel_split(self):
+        """Ask the running split to stop after the current page"""
+        if self.split_cancel is not None:
+            self.split_cancel.cancel()
+            self.split_cancel_btn.config(state='disabled')
+            self.show_status(self.split_status, "Cancelling split...", "loading")
+
+    def close(self):
+        """Stop running and queued jobs, then close the window"""
+        for cancel in (self.merge_cancel, self.split_cancel):
+            if cancel is not None:
+                cancel.cancel()
+        self.jobs.shutdown(cancel_futures=True)
+        self.root.destroy()
+
+    def toggle_profiling(self):
+        """Turn profiling of the next merges/splits on or off"""
+        self.profile_jobs = not self.profile_jobs
+        message = ("🔬 Profiling on - reports are saved next to the output" if self.profile_jobs
+                   else "🔬 Profiling off")
+        for label in (self.merge_status, self.split_status):
+            self.show_status(label, message, "loading")
 
     def show_status(self, label, message, status_type):
         """Show status message with appropriate styling"""
@@ -499,6 +775,11 @@ class ModernPDFToolApp:
         elif status_type == "loading":
             label.config(text=message, style='Loading.TLabel')
 
+    def show_progress(self, label, progress_bar, message, event):
+        """Show throttled progress (pages, pages/sec, ETA) for a running job"""
+        progress_bar.config(value=event.fraction)
+        self.show_status(label, f"{message} {event.describe()}", "loading")
+
 
 def main():
     """🚀 Launch the PDF Tools application"""
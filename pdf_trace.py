@@ -0,0 +1,171 @@
+"""
+⏱️ PDF Trace - Timing spans and counters for every pipeline stage
+Engine code marks its stages (open, parse, page-tree walk, add_page, write,
+fsync) with span() and counts pages, bytes and objects with count(). Tracing
+is off unless PDF_TOOLS_TRACE names an output file (or batch mode gets
+--trace); while off, span() hands back one shared no-op context manager and
+count() returns at once, so the marks cost a function call each.
+
+A path ending in .json is written as a Chrome trace (open it in
+chrome://tracing or ui.perfetto.dev); anything else as JSON lines. Both are
+appended to as each top-level operation finishes, so worker processes (which
+inherit the setting) add their own spans to the same file.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+
+ENV_VAR = 'PDF_TOOLS_TRACE'
+# Set by the process that started the trace; its children append instead of truncating
+_OWNER_ENV_VAR = 'PDF_TOOLS_TRACE_OWNER'
+# Events buffered before a flush even inside a long top-level span
+MAX_BUFFERED_EVENTS = 10000
+
+enabled = False
+_path: Optional[str] = None
+_chrome = False
+_events: List[Dict[str, Any]] = []
+_counters: Dict[str, int] = {}
+_lock = threading.Lock()
+_local = threading.local()
+_NO_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> '_Span':
+        _local.depth = getattr(_local, 'depth', 0) + 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end = time.perf_counter_ns()
+        _local.depth -= 1
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        _record(self.name, self.start, end, self.args)
+        if _local.depth == 0 or len(_events) >= MAX_BUFFERED_EVENTS:
+            flush()
+
+
+def span(name: str, **args: Any):
+    """Context manager timing one stage; args are attached to the event"""
+    if not enabled:
+        return _NO_SPAN
+    return _Span(name, args)
+
+
+def traced(name: str) -> Callable:
+    """Decorator wrapping every call of a function in span(name)"""
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, value: int = 1) -> None:
+    """Add value to a counter; counter totals are written whenever a top-level span ends"""
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def _record(name: str, start_ns: int, end_ns: int, args: Dict[str, Any]) -> None:
+    event = {'name': name, 'ph': 'X', 'ts': start_ns // 1000, 'dur': (end_ns - start_ns) // 1000,
+             'pid': os.getpid(), 'tid': threading.get_ident()}
+    if args:
+        event['args'] = args
+    with _lock:
+        _events.append(event)
+
+
+def _format(event: Dict[str, Any]) -> str:
+    if _chrome:
+        return json.dumps(event) + ',\n'
+    if event['ph'] == 'C':
+        return json.dumps({'type': 'counters', 'ts_us': event['ts'], 'pid': event['pid'],
+                           'values': event['args']}) + '\n'
+    line = {'type': 'span', 'name': event['name'], 'start_us': event['ts'], 'dur_us': event['dur'],
+            'pid': event['pid'], 'tid': event['tid']}
+    if 'args' in event:
+        line['args'] = event['args']
+    return json.dumps(line) + '\n'
+
+
+def flush() -> None:
+    """Append buffered events, and a snapshot of the counters, to the trace file"""
+    if _path is None:
+        return
+    with _lock:
+        events = _events[:]
+        _events.clear()
+        if _counters:
+            events.append({'name': 'counters', 'ph': 'C', 'ts': time.perf_counter_ns() // 1000,
+                           'pid': os.getpid(), 'args': dict(_counters)})
+    if not events:
+        return
+    # One append per flush, so lines from several processes do not interleave
+    fd = os.open(_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        os.write(fd, ''.join(_format(event) for event in events).encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def enable(path: str) -> None:
+    """Start tracing to path (.json: Chrome trace, otherwise JSON lines)
+
+    The first process to enable a trace starts the file afresh; processes
+    it starts, which inherit the environment, append to it.
+    """
+    global enabled, _path, _chrome
+    _path = os.path.abspath(path)
+    _chrome = _path.lower().endswith('.json')
+    if os.environ.get(_OWNER_ENV_VAR) is None:
+        # The closing ']' of a Chrome trace array is optional, which keeps the file appendable
+        with open(_path, 'w', encoding='utf-8') as file:
+            file.write('[\n' if _chrome else '')
+        os.environ[_OWNER_ENV_VAR] = str(os.getpid())
+    os.environ[ENV_VAR] = _path
+    enabled = True
+
+
+def disable() -> None:
+    global enabled
+    flush()
+    enabled = False
+
+
+def _forget_parent_events() -> None:
+    """In a forked child, drop what the parent had buffered but not yet written"""
+    global _local, _lock
+    _lock = threading.Lock()  # another thread may have held it at the fork
+    _events.clear()
+    _counters.clear()
+    _local = threading.local()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_parent_events)
+atexit.register(flush)
+
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR])
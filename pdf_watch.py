@@ -0,0 +1,343 @@
+"""
+👀 PDF Watch - Hot-folder ingestion
+Polls an inbox folder and turns PDFs dropped into it into merge or split jobs
+without anyone picking files by hand. A file is only taken once its size and
+modification time have stopped changing for --settle seconds, so copies still
+in progress are left alone. For merges, arrivals are grouped either by a
+filename pattern (--group-by, e.g. every "INV-1042-*.pdf" into INV-1042.pdf)
+or, without one, into batches closed once no new file has arrived for
+--window seconds. Jobs run on a process pool of --workers processes; inputs
+are then moved into processed/ or failed/ inside the inbox.
+
+Usage:
+    python pdf_tool_desktop.py watch inbox out --operation merge --group-by "^(INV-\\d+)"
+    python pdf_tool_desktop.py watch inbox out --operation split --workers 4 --options '{"pages_per_file": 10}'
+    python pdf_tool_desktop.py watch inbox out --once     (process what is there, then exit)
+"""
+
+import fnmatch
+import os
+import re
+import shutil
+import signal
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pdf_batch
+import pdf_engine
+import pdf_preflight
+from pdf_batch import JobOutcome
+from pdf_output import FSYNC_NONE, OutputBatch
+
+
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_WINDOW_SECONDS = 10.0
+DEFAULT_POLL_SECONDS = 1.0
+DEFAULT_REPORT_SECONDS = 60.0
+PROCESSED_FOLDER = 'processed'
+FAILED_FOLDER = 'failed'
+WATCH_OPERATIONS = ('merge', 'split')
+
+
+@dataclass
+class WatchConfig:
+    """How a folder is watched and what is done with its files"""
+    inbox: str
+    output_dir: str
+    operation: str = 'merge'
+    pattern: str = '*.pdf'
+    group_by: Optional[str] = None   # regex; files with the same match (or first group) are merged together
+    window: float = DEFAULT_WINDOW_SECONDS
+    settle: float = DEFAULT_SETTLE_SECONDS
+    poll: float = DEFAULT_POLL_SECONDS
+    workers: int = 1
+    options: Dict[str, Any] = field(default_factory=dict)  # batch options by name, as for the job server
+
+
+@dataclass
+class WatchMetrics:
+    """Running totals for a watch session"""
+    started: float = field(default_factory=time.monotonic)
+    files_done: int = 0
+    files_failed: int = 0
+    jobs_done: int = 0
+    jobs_failed: int = 0
+    pages: int = 0
+    bytes_in: int = 0
+    latency_total: float = 0.0  # seconds from a file settling to its job finishing, summed
+
+    def record(self, outcome: JobOutcome, files: int, size: int, latency: float) -> None:
+        if outcome.ok:
+            self.jobs_done += 1
+            self.files_done += files
+            self.pages += outcome.pages
+            self.bytes_in += size
+        else:
+            self.jobs_failed += 1
+            self.files_failed += files
+        self.latency_total += latency * files
+
+    def describe(self, waiting: int = 0, running: int = 0) -> str:
+        """e.g. '12 jobs (1 failed) • 340 files • 12.3 pages/s • 4.1 MB/s • 2.0s avg latency • 3 waiting'"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        files = self.files_done + self.files_failed
+        text = (f"{self.jobs_done + self.jobs_failed} jobs ({self.jobs_failed} failed) • {files} files • "
+                f"{self.pages / elapsed:.1f} pages/s • {self.bytes_in / elapsed / (1024 * 1024):.1f} MB/s")
+        if files:
+            text += f" • {self.latency_total / files:.1f}s avg latency"
+        return text + f" • {waiting} waiting, {running} running"
+
+
+@dataclass
+class _Arrival:
+    """A file seen in the inbox and how long it has looked unchanged"""
+    size: int
+    mtime_ns: int
+    unchanged_since: float
+
+
+@dataclass
+class _Group:
+    """Settled files waiting to be merged together"""
+    key: str
+    paths: List[str] = field(default_factory=list)
+    last_added: float = 0.0
+
+
+@dataclass
+class _Running:
+    paths: List[str]
+    target: str
+    size: int
+    settled: float
+
+
+def _init_worker() -> None:
+    # Ctrl+C reaches the whole process group, but only the watcher decides when to stop;
+    # running jobs finish, and SIGTERM no longer runs the watcher's handler inherited at fork
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Jobs already run side by side; preflight checks inside one need no pool of their own
+    pdf_preflight.DEFAULT_WORKERS = 1
+
+
+def _run_watch_job(operation: str, job: Dict[str, Any], base_dir: str, overrides: Dict[str, Any]) -> JobOutcome:
+    """Run one watch job inside a pool worker"""
+    if operation == 'split':
+        overrides = {'workers': 1, **overrides}
+    if operation == 'merge' and len(job['inputs']) == 1:
+        # A group of one is passed through as it is, once it passes the checks a merge input gets
+        start = time.perf_counter()
+        check = pdf_preflight.check_input(job['inputs'][0])
+        if not check.ok:
+            return JobOutcome(0, operation, job['output'], False,
+                              error=f"{os.path.basename(check.path)} {check.error}",
+                              seconds=time.perf_counter() - start)
+        try:
+            with OutputBatch(overrides.get('fsync', FSYNC_NONE)) as outputs, outputs.open(job['output']) as output, \
+                    open(job['inputs'][0], 'rb') as source:
+                shutil.copyfileobj(source, output)
+        except Exception as e:
+            return JobOutcome(0, operation, job['output'], False, error=str(e),
+                              seconds=time.perf_counter() - start)
+        return JobOutcome(0, operation, job['output'], True, pages=check.page_count,
+                          seconds=time.perf_counter() - start, note='single file')
+    return pdf_batch.run_job(operation, job, base_dir, pdf_batch.default_options(operation, **overrides))
+
+
+def _free_path(path: str, reserved: Set[str] = frozenset()) -> str:
+    """path, or path with a -2, -3, ... suffix if it already exists (or is reserved)"""
+    stem, extension = os.path.splitext(path)
+    number = 1
+    while os.path.exists(path) or path in reserved:
+        number += 1
+        path = f"{stem}-{number}{extension}"
+    return path
+
+
+def _move(path: str, folder: str) -> None:
+    os.makedirs(folder, exist_ok=True)
+    try:
+        os.replace(path, _free_path(os.path.join(folder, os.path.basename(path))))
+    except OSError as e:
+        print(f"⚠️ Could not move {path}: {e}", file=sys.stderr)
+
+
+class FolderWatcher:
+    """Poll an inbox, group settled files into jobs and run them on a process pool"""
+
+    def __init__(self, config: WatchConfig, stream=None):
+        if config.operation not in WATCH_OPERATIONS:
+            raise pdf_engine.PDFEngineError(f"Watch mode runs {' or '.join(WATCH_OPERATIONS)} jobs")
+        # Job paths are built from these and must not be resolved against the inbox a second time
+        config = replace(config, inbox=os.path.abspath(config.inbox), output_dir=os.path.abspath(config.output_dir))
+        if config.inbox == config.output_dir:
+            raise pdf_engine.PDFEngineError("The output folder must not be the watched folder")
+        pdf_batch.default_options(config.operation, **config.options)  # reject unknown options up front
+        self.config = config
+        self.stream = stream or sys.stdout
+        self.metrics = WatchMetrics()
+        self._group_pattern = re.compile(config.group_by) if config.group_by else None
+        self._arrivals: Dict[str, _Arrival] = {}
+        self._groups: Dict[str, _Group] = {}
+        self._claimed: Set[str] = set()  # grouped or running, no longer watched
+        self._targets: Set[str] = set()  # outputs of running jobs
+        self._running: Dict[Future, _Running] = {}
+        self._settled_at: Dict[str, float] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _scan(self, now: float) -> List[str]:
+        """Update arrivals from one directory listing and return the files that have settled"""
+        seen = set()
+        settled = []
+        with os.scandir(self.config.inbox) as entries:
+            for entry in entries:
+                if (entry.name.startswith('.') or entry.path in self._claimed
+                        or not fnmatch.fnmatch(entry.name.lower(), self.config.pattern.lower())):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                seen.add(entry.path)
+                arrival = self._arrivals.get(entry.path)
+                if arrival is None or (arrival.size, arrival.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                    self._arrivals[entry.path] = _Arrival(stat.st_size, stat.st_mtime_ns, now)
+                elif now - arrival.unchanged_since >= self.config.settle:
+                    settled.append(entry.path)
+        # Files that disappeared before settling are forgotten
+        for path in list(self._arrivals):
+            if path not in seen:
+                del self._arrivals[path]
+        for path in settled:
+            del self._arrivals[path]
+            self._claimed.add(path)
+            self._settled_at[path] = now
+        return sorted(settled)
+
+    def _group_key(self, path: str) -> str:
+        if self._group_pattern is None:
+            return ''
+        name = os.path.basename(path)
+        match = self._group_pattern.search(name)
+        if match is None:
+            return os.path.splitext(name)[0]  # unmatched files stand alone
+        return match.group(1) if match.groups() else match.group(0)
+
+    def _ready_jobs(self, settled: List[str], now: float, flush: bool) -> List[Tuple[Dict[str, Any], List[str]]]:
+        """Turn settled files into (job, input paths) pairs; merge groups wait out their window"""
+        if self.config.operation == 'split':
+            return [({'source': path,
+                      'output_dir': _free_path(os.path.join(self.config.output_dir,
+                                                            os.path.splitext(os.path.basename(path))[0]),
+                                               self._targets)},
+                     [path]) for path in settled]
+
+        for path in settled:
+            key = self._group_key(path)
+            group = self._groups.setdefault(key, _Group(key))
+            group.paths.append(path)
+            group.last_added = now
+
+        jobs = []
+        for key, group in list(self._groups.items()):
+            if flush or now - group.last_added >= self.config.window:
+                del self._groups[key]
+                name = key or time.strftime('merged-%Y%m%d-%H%M%S')
+                output = _free_path(os.path.join(self.config.output_dir, f"{name}.pdf"), self._targets)
+                jobs.append(({'inputs': sorted(group.paths), 'output': output}, sorted(group.paths)))
+        return jobs
+
+    def _submit(self, job: Dict[str, Any], paths: List[str]) -> None:
+        size = 0
+        for path in paths:
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        future = self._executor.submit(_run_watch_job, self.config.operation, job, self.config.inbox,
+                                       self.config.options)
+        target = pdf_batch.job_target(job)
+        self._targets.add(target)
+        self._running[future] = _Running(paths, target, size, min(self._settled_at.pop(path) for path in paths))
+
+    def _collect(self, now: float) -> None:
+        """Record finished jobs and move their inputs out of the inbox"""
+        for future in [future for future in self._running if future.done()]:
+            running = self._running.pop(future)
+            self._targets.discard(running.target)
+            interrupted = False
+            try:
+                outcome = future.result()
+            except BaseException as e:  # a worker that was interrupted or killed fails its job
+                interrupted = isinstance(e, BrokenProcessPool) or not isinstance(e, Exception)
+                error = str(e) or type(e).__name__
+                if interrupted:
+                    error = f"interrupted, inputs left in the inbox ({error})"
+                outcome = JobOutcome(0, self.config.operation, running.target, False, error=error)
+            outcome.index = self.metrics.jobs_done + self.metrics.jobs_failed + 1
+            self.metrics.record(outcome, len(running.paths), running.size, now - running.settled)
+            folder = PROCESSED_FOLDER if outcome.ok else FAILED_FOLDER
+            for path in running.paths:
+                # Inputs of an interrupted job are not at fault; the next session picks them up again
+                if not interrupted:
+                    _move(path, os.path.join(self.config.inbox, folder))
+                self._claimed.discard(path)
+            print(pdf_batch.describe_outcome(outcome), file=self.stream, flush=True)
+
+    def report(self) -> None:
+        waiting = len(self._arrivals) + sum(len(group.paths) for group in self._groups.values())
+        print(f"📈 {self.metrics.describe(waiting, len(self._running))}", file=self.stream, flush=True)
+
+    def run(self, once: bool = False, report_interval: float = DEFAULT_REPORT_SECONDS) -> WatchMetrics:
+        """Watch until interrupted, or with once=True until the inbox has nothing left to process"""
+        os.makedirs(self.config.output_dir, exist_ok=True)
+        print(f"👀 Watching {self.config.inbox} -> {self.config.output_dir} "
+              f"({self.config.operation}, {self.config.workers} workers)", file=self.stream, flush=True)
+        next_report = time.monotonic() + report_interval
+        self._executor = ProcessPoolExecutor(max_workers=self.config.workers, initializer=_init_worker)
+        try:
+            while True:
+                now = time.monotonic()
+                settled = self._scan(now)
+                # Once nothing else is about to settle, a --once run need not wait out merge windows
+                flush = once and not self._arrivals
+                for job, paths in self._ready_jobs(settled, now, flush):
+                    self._submit(job, paths)
+                self._collect(now)
+
+                if once and not (self._arrivals or self._groups or self._running):
+                    break
+                if now >= next_report:
+                    self.report()
+                    next_report = now + report_interval
+                time.sleep(self.config.poll)
+        except KeyboardInterrupt:
+            print("⏹ Stopping: waiting for running jobs (files not yet submitted stay in the inbox)",
+                  file=self.stream, flush=True)
+        finally:
+            self._executor.shutdown(wait=True)
+            self._collect(time.monotonic())
+            self.report()
+        return self.metrics
+
+
+def watch(config: WatchConfig, once: bool = False, report_interval: float = DEFAULT_REPORT_SECONDS) -> int:
+    """Run a watch session and return the process exit code"""
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # A service manager's SIGTERM stops the session like Ctrl+C
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        metrics = FolderWatcher(config).run(once=once, report_interval=report_interval)
+    except (OSError, re.error, pdf_engine.PDFEngineError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    return 0 if metrics.jobs_failed == 0 else 1
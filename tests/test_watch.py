@@ -0,0 +1,106 @@
+"""
+🧪 Watch mode - stopping a session while a job is running
+The watcher runs as a real subprocess in its own process group, and the
+signal goes to the whole group, as Ctrl+C in a terminal or a service
+manager's stop would send it.
+
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import PyPDF2
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINT = os.path.join(REPO_DIR, 'pdf_tool_desktop.py')
+
+# Large enough that the merge is still running when the signal arrives
+PAGES_PER_INPUT = 6000
+# Settle time plus a few polls: the group has been submitted by then
+SUBMIT_WAIT_SECONDS = 1.5
+STOP_TIMEOUT_SECONDS = 120
+
+
+def write_blank_pdf(path: str, pages: int) -> None:
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(612, 792)
+    with open(path, 'wb') as file:
+        writer.write(file)
+
+
+@unittest.skipUnless(hasattr(os, 'killpg'), "needs POSIX process groups")
+class WatchInterruptTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sources = tempfile.mkdtemp(prefix='pdfwatch_src_')
+        for name in ('a', 'b'):
+            write_blank_pdf(os.path.join(cls.sources, f'{name}.pdf'), PAGES_PER_INPUT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.sources, ignore_errors=True)
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='pdfwatch_')
+        self.inbox = os.path.join(self.folder, 'inbox')
+        self.output_dir = os.path.join(self.folder, 'out')
+        os.makedirs(self.inbox)
+        for name in ('a', 'b'):
+            shutil.copy(os.path.join(self.sources, f'{name}.pdf'), os.path.join(self.inbox, f'JOB-1_{name}.pdf'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def stop_running_job(self, signum: int):
+        """Start a watcher, let it submit the merge, signal its process group and wait for it"""
+        watcher = subprocess.Popen(
+            [sys.executable, ENTRY_POINT, 'watch', self.inbox, self.output_dir, '--group-by', r'JOB-\d+',
+             '--window', '0', '--settle', '0.2', '--poll', '0.1'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True)
+        try:
+            time.sleep(SUBMIT_WAIT_SECONDS)
+            os.killpg(watcher.pid, signum)
+            out, err = watcher.communicate(timeout=STOP_TIMEOUT_SECONDS)
+        finally:
+            if watcher.poll() is None:
+                os.killpg(watcher.pid, signal.SIGKILL)
+                watcher.wait()
+        self.assertNotIn('Traceback', err)
+        self.assertIn('⏹ Stopping', out)
+        self.assertIn('📈 1 jobs', out)  # the final report
+        return watcher.returncode, out
+
+    def inbox_files(self, folder: str = '') -> list:
+        path = os.path.join(self.inbox, folder)
+        return sorted(name for name in os.listdir(path) if name.endswith('.pdf')) if os.path.isdir(path) else []
+
+    def test_ctrl_c_lets_the_running_job_finish(self):
+        returncode, out = self.stop_running_job(signal.SIGINT)
+
+        self.assertEqual(returncode, 0)
+        self.assertIn(f'({2 * PAGES_PER_INPUT} pages', out)
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, 'JOB-1.pdf')))
+        self.assertEqual(self.inbox_files('processed'), ['JOB-1_a.pdf', 'JOB-1_b.pdf'])
+        self.assertEqual(self.inbox_files(), [])
+
+    def test_sigterm_to_the_group_leaves_inputs_for_the_next_session(self):
+        returncode, out = self.stop_running_job(signal.SIGTERM)
+
+        self.assertEqual(returncode, 1)
+        self.assertIn('interrupted, inputs left in the inbox', out)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'JOB-1.pdf')))
+        self.assertEqual(self.inbox_files(), ['JOB-1_a.pdf', 'JOB-1_b.pdf'])
+        self.assertEqual(self.inbox_files('failed'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()